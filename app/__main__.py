@@ -1,44 +1,138 @@
-import threading
+import asyncio
+import os
+import signal
+import ssl
 
 from aiogram import Dispatcher
+from aiogram.types import FSInputFile
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
+from app.database.cache import listen_user_changes, profile_cache, user_cache
 from app.database.models import async_init
+from app.database.writer import writer
+from app.dispatcher import build_dispatcher
 from app.instances import bot, loop
 from app.logger import setup_logger
-from app.middlewares import AlbumMiddleware, LoggingMiddleware
-from app.roles.admin import admin
-from app.roles.moderator import moderator
-from app.roles.user import user
-from app.utils.file_forwarder import run_forwarder
+from app.middlewares import album_middleware
+from app.utils.directory import directory
+from app.utils.export import shutdown_exports
+from app.utils.file_forwarder import create_forwarder
+from app.utils.file_info import file_info_cache
+from app.utils.notifier import notifier
+from app.utils.scheduler import scheduler
+from app.workers import WORKERS, WorkerPool
 
 logger = setup_logger(__name__)
 
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv("BOT_MODE") or "polling"
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT") or 8443)
+WEBHOOK_PATH = "/webhook"
+SSL_CERT = "../data/cert.pem"
+SSL_KEY = "../data/key.pem"
+
+
+async def run_webhook(dp: Dispatcher):
+    """Приём обновлений через webhook с самоподписанным сертификатом.
+
+    Обновления подтверждаются сразу, обработка идёт в фоне.
+
+    Args:
+        dp (Dispatcher): Диспетчер.
+    """
+    allowed_updates = dp.resolve_used_update_types()
+    secret = os.getenv("WEBHOOK_SECRET") or None
+    app = web.Application()
+    SimpleRequestHandler(dp, bot, handle_in_background=True, secret_token=secret).register(
+        app, path=WEBHOOK_PATH
+    )
+    setup_application(app, dp, bot=bot)
+
+    ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ssl_context.load_cert_chain(SSL_CERT, SSL_KEY)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", WEBHOOK_PORT, ssl_context=ssl_context).start()
+
+    url = f"https://{os.getenv('SERVER_HOST')}:{WEBHOOK_PORT}{WEBHOOK_PATH}"
+    await bot.set_webhook(
+        url,
+        certificate=FSInputFile(SSL_CERT),
+        allowed_updates=allowed_updates,
+        secret_token=secret,
+    )
+    logger.info(f"Webhook установлен ({url}), allowed_updates={allowed_updates}")
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
 
-async def main():
-    """Настройка конфигурации бота и подключение роутеров."""
-    user.message.middleware(AlbumMiddleware())
 
-    dp = Dispatcher()
-    dp.include_routers(user, moderator, admin)
-    dp.callback_query.middleware(LoggingMiddleware())
-    dp.message.middleware(LoggingMiddleware())
+async def run_polling(dp: Dispatcher):
+    """Приём обновлений через long polling.
 
+    Args:
+        dp (Dispatcher): Диспетчер.
+    """
+    await bot.delete_webhook()
+    await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+
+
+async def main():
+    """Настройка конфигурации бота и подключение роутеров."""
     # Инициализация БД
     await async_init()
 
-    logger.info("Старт бота")
-    await dp.start_polling(bot)
+    # Обработка в основном процессе или раздача обновлений процессам-обработчикам
+    pool = None
+    if WORKERS > 0:
+        pool = WorkerPool(WORKERS)
+        pool.start()
+        dp = pool.dispatcher()
+    else:
+        dp = build_dispatcher()
+        writer.start()
+        notifier.start(bot)
+
+    # Межпроцессная инвалидация кеша пользователей
+    listener = asyncio.create_task(listen_user_changes())
+
+    # Сервер для переадресации запросов на получение приложений из тг
+    forwarder = create_forwarder()
+    forwarder_task = asyncio.create_task(forwarder.serve())
+
+    logger.info(f"Старт бота ({BOT_MODE}, workers={WORKERS})")
+    try:
+        if BOT_MODE == "webhook":
+            await run_webhook(dp)
+        else:
+            await run_polling(dp)
+    finally:
+        # Сначала досылаются отложенные записи, затем останавливается остальное
+        await writer.stop()
+        await notifier.stop()
+        if pool:
+            await pool.stop()
+        forwarder.should_exit = True
+        await forwarder_task
+        shutdown_exports()
+        listener.cancel()
+        logger.info(f"Статистика кеша пользователей: {user_cache.stats()}")
+        logger.info(f"Статистика кеша профилей: {profile_cache.stats()}")
+        logger.info(f"Статистика кеша getFile: {file_info_cache.stats()}")
+        logger.info(f"Статистика справочника имён: {directory.stats()}")
+        logger.info(f"Статистика исходящих запросов: {scheduler.stats()}")
+        logger.info(f"Статистика сборки альбомов: {album_middleware.stats()}")
 
 
 if __name__ == "__main__":
     """Точка входа в программу."""
 
-    # Запуск сервера для переадресации запросов на получение приложение из тг
-    logger.info("Запуск сервера в отдельном потоке")
-    forwarder_thread = threading.Thread(target=run_forwarder)
-    forwarder_thread.daemon = True
-    forwarder_thread.start()
-
     try:
         logger.info("Асинхронный запуск бота")
         loop.run_until_complete(main())
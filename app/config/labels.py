@@ -41,9 +41,10 @@ INPUT_BAN_REASON = "Выберите причину бана:"
 INPUT_USER_ID_UNBAN = "Введите *id пользователей* _(через пробел или с новой строки)_, \
 чтобы *разбанить* их:"
 CHOOSE_BAN_TERM = "Выберите срок бана пользователей:"
-SUCCESSFUL_BAN = "Валидные пользователи _({ids})_ забанены на *{term} дней* (до {banEnd}) \
+SUCCESSFUL_BAN = "Валидные пользователи ({ids}) забанены на *{term} дней* (до {banEnd}) \
 по причине _{reason}_."
-SUCCESSFUL_UNBAN = "Валидные пользователи _({})_ разбанены."
+SUCCESSFUL_UNBAN = "Валидные пользователи ({ids}) разбанены."
+AND_MORE = " и ещё {}"
 BAN_YOURSELF = "Вы не можете *себя* забанить."
 BAN_YOUR_ROLE = "Вы не можете забанить *других модераторов*."
 DOWNLOAD_FAIL = "Не удалось загрузить БД."
@@ -52,13 +53,16 @@ NEW_APPEALS = "Новые обращения."
 EMPTY_BANS = "Список забаненых пуст."
 EMPTY_NEW_APPEALS = "Список новых обращений пуст."
 EMPTY_ALL_APPEALS = "Список обращений пуст."
+# Отправляется без разметки - содержит текст пользователя
+APPEAL_CARD = "Новое обращение (user id={user_id})\nКатегория: {category}\nМесто: {address}\n\
+Описание: {body}\nДоп. информация: {police}\n{attachments}"
 
 
 # ADMIN
 CHOOSE_ACTION = "*Выберите действие:*"
 INPUT_MODER_ID = "Введите *id пользователя*, чтобы назначить его *модератором*:"
-MODER_APPOINTED = "Пользователь _@{}_ назначен *модератором*."
-MODER_DEMOTE = "Пользователь _@{}_ *разжалован*."
+MODER_APPOINTED = "Пользователь {} назначен *модератором*."
+MODER_DEMOTE = "Пользователь {} *разжалован*."
 ALREADY_MODER = "Пользователь *уже является* модератором."
 BAD_ID = "Некорректный id пользователя."
 YOU_MODER = "*Вы назначены модератором.*"
@@ -84,3 +88,4 @@ CLOSE = "Закрыть❌"
 DEMOTE = "Разжаловать♻️"
 DOWNLOAD_NEW = "Загрузить новые {} обращений"
 DOWNLOAD_ALL = "Загрузить все {} обращений"
+DOWNLOAD_ALL_CSV = "Загрузить все {} обращений (csv)"
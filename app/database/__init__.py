@@ -22,3 +22,12 @@ class AppLen:
 class AttachmentLen:
     HASH = 50
     LINK = 128
+
+
+class ChatNameLen:
+    USERNAME = 32
+    FULLNAME = 129
+
+
+class FsmStateLen:
+    STATE = 100
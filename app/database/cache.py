@@ -0,0 +1,127 @@
+import asyncio
+import uuid
+from os import getenv
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import engine
+from app.logger import setup_logger
+from app.utils.cache import TTLCache
+
+logger = setup_logger(__name__)
+
+# Канал Postgres для межпроцессной инвалидации кеша пользователей
+USER_CHANNEL = "user_cache"
+
+# Канал Postgres для инвалидации кеша состояний FSM между экземплярами бота
+FSM_CHANNEL = "fsm_state"
+
+# Максимальная длина payload у NOTIFY меньше 8000 байт
+NOTIFY_CHUNK = 400
+
+# Метка процесса в уведомлениях FSM, свои уведомления пропускаются
+INSTANCE_ID = uuid.uuid4().hex
+
+# Кеш строк таблицы User (роль, бан), общий для процесса
+user_cache = TTLCache(
+    maxsize=int(getenv("USER_CACHE_SIZE") or 10000),
+    ttl=float(getenv("USER_CACHE_TTL") or 300),
+)
+
+# Кеш строк таблицы UserInfo (в том числе отсутствие профиля) для контекста update
+profile_cache = TTLCache(
+    maxsize=int(getenv("USER_CACHE_SIZE") or 10000),
+    ttl=float(getenv("USER_CACHE_TTL") or 300),
+)
+
+
+# Кеш состояний и данных FSM по (bot_id, chat_id, user_id)
+fsm_cache = TTLCache(
+    maxsize=int(getenv("FSM_CACHE_SIZE") or 10000),
+    ttl=float(getenv("FSM_CACHE_TTL") or 30),
+)
+
+
+def invalidate_users(*user_ids):
+    """Удаление пользователей и их профилей из кешей процесса.
+
+    Args:
+        user_ids (int): Идентификаторы пользователей.
+    """
+    user_cache.pop(*user_ids)
+    profile_cache.pop(*user_ids)
+
+
+async def notify_user_changed(session: AsyncSession, *user_ids):
+    """Уведомление других экземпляров бота об изменении пользователей.
+
+    NOTIFY транзакционный: сообщение уйдёт только после commit сессии.
+
+    Args:
+        session (AsyncSession): Сессия, в которой изменяются пользователи.
+        user_ids (int): Идентификаторы пользователей.
+    """
+    for i in range(0, len(user_ids), NOTIFY_CHUNK):
+        payload = ",".join(str(user_id) for user_id in user_ids[i : i + NOTIFY_CHUNK])
+        await session.execute(select(func.pg_notify(USER_CHANNEL, payload)))
+
+
+def _on_user_changed(connection, pid, channel, payload: str):
+    """Обработка NOTIFY об изменении пользователей."""
+    invalidate_users(*(int(user_id) for user_id in payload.split(",") if user_id))
+
+
+async def notify_fsm_changed(session: AsyncSession, key: tuple):
+    """Уведомление других процессов и экземпляров бота об изменении FSM.
+
+    Args:
+        session (AsyncSession): Сессия, в которой изменяется состояние.
+        key (tuple): (bot_id, chat_id, user_id).
+    """
+    payload = ":".join(map(str, (INSTANCE_ID, *key)))
+    await session.execute(select(func.pg_notify(FSM_CHANNEL, payload)))
+
+
+def _on_fsm_changed(connection, pid, channel, payload: str):
+    """Обработка NOTIFY об изменении состояния FSM."""
+    instance, *key = payload.split(":")
+    if instance != INSTANCE_ID:
+        fsm_cache.pop(tuple(int(part) for part in key))
+
+
+async def listen_user_changes(retry_delay: float = 5):
+    """Прослушивание инвалидаций кешей пользователей и FSM через LISTEN.
+
+    При потере соединения кеши очищаются, так как уведомления могли быть пропущены.
+
+    Args:
+        retry_delay (float, optional): Задержка переподключения. Defaults to 5.
+    """
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    while True:
+        closed = asyncio.Event()
+        try:
+            conn = await asyncpg.connect(dsn)
+        except Exception as ex:
+            logger.error(f"Не удалось подключиться для LISTEN {USER_CHANNEL} - {ex}")
+            await asyncio.sleep(retry_delay)
+            continue
+
+        conn.add_termination_listener(lambda _, closed=closed: closed.set())
+        try:
+            await conn.add_listener(USER_CHANNEL, _on_user_changed)
+            await conn.add_listener(FSM_CHANNEL, _on_fsm_changed)
+            logger.info(f"Подписка на инвалидацию кеша пользователей ({USER_CHANNEL})")
+            await closed.wait()
+            logger.error("Соединение LISTEN потеряно. Очистка кеша пользователей")
+        except Exception as ex:
+            logger.error(f"Ошибка LISTEN {USER_CHANNEL} - {ex}")
+        finally:
+            user_cache.clear()
+            profile_cache.clear()
+            fsm_cache.clear()
+            if not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(retry_delay)
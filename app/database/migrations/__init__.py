@@ -0,0 +1,50 @@
+"""Версионные миграции схемы БД.
+
+Каждая миграция - модуль `mNNNN_<описание>.py` с корутиной `upgrade(conn)`,
+где NNNN - номер версии. Миграции применяются по возрастанию версии,
+применённые версии хранятся в таблице schemaVersion.
+"""
+
+import importlib
+import pkgutil
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database.models import SchemaVersion
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Ключ advisory lock для инициализации БД
+MIGRATION_LOCK = 7_362_011
+
+
+def get_migrations():
+    """Поиск модулей миграций.
+
+    Returns:
+        list[tuple[int, ModuleType]]: Версии и модули по возрастанию версии.
+    """
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        if not module_info.name.startswith("m"):
+            continue
+        version = int(module_info.name[1:].split("_")[0])
+        migrations.append((version, importlib.import_module(f"{__name__}.{module_info.name}")))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+async def migrate(conn: AsyncConnection):
+    """Применение недостающих миграций в текущей транзакции.
+
+    Args:
+        conn (AsyncConnection): Соединение с открытой транзакцией.
+    """
+    applied = set(await conn.scalars(select(SchemaVersion.version)))
+    for version, module in get_migrations():
+        if version in applied:
+            continue
+        logger.info(f"Применение миграции {module.__name__}")
+        await module.upgrade(conn)
+        await conn.execute(insert(SchemaVersion).values(version=version))
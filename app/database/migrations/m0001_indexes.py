@@ -0,0 +1,23 @@
+"""Индексы для выгрузки обращений, списка модераторов и забаненых."""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection):
+    await conn.execute(
+        text('CREATE INDEX IF NOT EXISTS "ix_application_dt" ON "application" ("dt")')
+    )
+    await conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_user_role" ON "user" ("role")'))
+    await conn.execute(
+        text(
+            'CREATE INDEX IF NOT EXISTS "ix_user_banEnd" ON "user" ("banEnd") '
+            'WHERE "banEnd" IS NOT NULL'
+        )
+    )
+    await conn.execute(
+        text(
+            'CREATE INDEX IF NOT EXISTS "ix_user_lastDbReq" ON "user" ("lastDbReq") '
+            'WHERE "lastDbReq" IS NOT NULL'
+        )
+    )
@@ -0,0 +1,11 @@
+"""Составной индекс для постраничного списка модераторов."""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection):
+    await conn.execute(
+        text('CREATE INDEX IF NOT EXISTS "ix_user_role_id" ON "user" ("role", "id")')
+    )
+    await conn.execute(text('DROP INDEX IF EXISTS "ix_user_role"'))
@@ -0,0 +1,32 @@
+"""Составной индекс для выгрузки обращений по курсору модератора.
+
+Курсоры заполняются по прежней общей отметке max(lastDbReq), чтобы первая
+выгрузка новых обращений после обновления не возвращала все обращения.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection):
+    await conn.execute(
+        text(
+            'CREATE INDEX IF NOT EXISTS "ix_application_dt_user_msg" '
+            'ON "application" ("dt", "userId", "msgId")'
+        )
+    )
+    await conn.execute(text('DROP INDEX IF EXISTS "ix_application_dt"'))
+    await conn.execute(
+        text(
+            'WITH "last" AS ('
+            '  SELECT "dt", "userId", "msgId" FROM "application"'
+            '  WHERE "dt" <= (SELECT max("lastDbReq") FROM "user")'
+            '  ORDER BY "dt" DESC, "userId" DESC, "msgId" DESC LIMIT 1'
+            ") "
+            'INSERT INTO "exportCursor" ("userId", "dt", "appUserId", "msgId") '
+            'SELECT "user"."id", "last"."dt", "last"."userId", "last"."msgId" '
+            'FROM "user" CROSS JOIN "last" '
+            'WHERE "user"."role" >= 1 OR "user"."lastDbReq" IS NOT NULL '
+            "ON CONFLICT DO NOTHING"
+        )
+    )
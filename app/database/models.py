@@ -1,11 +1,29 @@
 import os
-from datetime import datetime
-
-from sqlalchemy import BigInteger, DateTime, ForeignKey, SmallInteger, String
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    func,
+    select,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-from app.database import AppLen, AttachmentLen, UserInfoLen, UserLen
+from app.database import (
+    AppLen,
+    AttachmentLen,
+    ChatNameLen,
+    FsmStateLen,
+    UserInfoLen,
+    UserLen,
+)
 
 engine = create_async_engine(
     url=f"postgresql+asyncpg://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}\
@@ -41,6 +59,12 @@ class User(Base):
     banReason: Mapped[str] = mapped_column(String(UserLen.BAN_REASON), nullable=True)
     lastDbReq: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
 
+    __table_args__ = (
+        Index("ix_user_role_id", "role", "id"),
+        Index("ix_user_banEnd", "banEnd", postgresql_where=banEnd.isnot(None)),
+        Index("ix_user_lastDbReq", "lastDbReq", postgresql_where=lastDbReq.isnot(None)),
+    )
+
 
 class UserInfo(Base):
     """Таблица личных данных пользователя.
@@ -75,6 +99,26 @@ class Application(Base):
     police: Mapped[str] = mapped_column(String(AppLen.POLICE))
     attachments: Mapped[str] = mapped_column(String(AppLen.ATTACHMENTS), nullable=True)
 
+    # Порядок выгрузки и позиция курсора выгрузки
+    __table_args__ = (Index("ix_application_dt_user_msg", "dt", "userId", "msgId"),)
+
+
+class ExportCursor(Base):
+    """Таблица позиций выгрузки обращений модераторами.
+
+    Хранит ключ (dt, userId, msgId) последнего выгруженного обращения.
+
+    Args:
+        Base (AsyncAttrs, DeclarativeBase): Класс единого обращения.
+    """
+
+    __tablename__ = "exportCursor"
+
+    userId: Mapped[int] = mapped_column(BigInteger, ForeignKey("user.id"), primary_key=True)
+    dt: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    appUserId: Mapped[int] = mapped_column(BigInteger)
+    msgId: Mapped[int] = mapped_column(BigInteger)
+
 
 class Attachment(Base):
     """Таблица соответствия между файлом тг и реальным.
@@ -89,12 +133,65 @@ class Attachment(Base):
     link: Mapped[str] = mapped_column(String(AttachmentLen.LINK), unique=True)
 
 
+class ChatName(Base):
+    """Таблица имён пользователей тг, обновляемая из входящих сообщений.
+
+    Args:
+        Base (AsyncAttrs, DeclarativeBase): Класс единого обращения.
+    """
+
+    __tablename__ = "chatName"
+
+    userId: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    username: Mapped[str] = mapped_column(String(ChatNameLen.USERNAME), nullable=True)
+    fullName: Mapped[str] = mapped_column(String(ChatNameLen.FULLNAME), nullable=True)
+    updatedAt: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class FsmState(Base):
+    """Таблица состояний FSM.
+
+    Args:
+        Base (AsyncAttrs, DeclarativeBase): Класс единого обращения.
+    """
+
+    __tablename__ = "fsmState"
+
+    botId: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    chatId: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    userId: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    state: Mapped[str] = mapped_column(String(FsmStateLen.STATE), nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, default=dict)
+
+
+class SchemaVersion(Base):
+    """Таблица применённых миграций.
+
+    Args:
+        Base (AsyncAttrs, DeclarativeBase): Класс единого обращения.
+    """
+
+    __tablename__ = "schemaVersion"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    appliedAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
 async def async_init():
-    """Асинхронная инициализация БД, генерация таблиц."""
+    """Асинхронная инициализация БД, генерация таблиц и применение миграций.
+
+    Выполняется под advisory lock, чтобы несколько экземпляров бота
+    не применяли миграции одновременно.
+    """
+    from app.database.migrations import MIGRATION_LOCK, migrate
     from app.logger import setup_logger
 
     logger = setup_logger(__name__)
 
     async with engine.begin() as conn:
         logger.info("Инициализация БД")
+        await conn.execute(select(func.pg_advisory_xact_lock(MIGRATION_LOCK)))
         await conn.run_sync(Base.metadata.create_all)
+        await migrate(conn)
@@ -1,22 +1,106 @@
 import hashlib
 from datetime import datetime, timedelta, timezone
+from functools import partial
+from math import ceil
 from os import getenv
 
-import pandas as pd
-from sqlalchemy import and_, func, select, update
-
-from app.database import AppLen, UserInfoLen
-from app.database.models import Application, Attachment, User, UserInfo, async_session
+from sqlalchemy import (
+    BigInteger,
+    and_,
+    any_,
+    func,
+    literal,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AppLen, ChatNameLen, UserInfoLen
+from app.database.cache import notify_user_changed, profile_cache, user_cache
+from app.database.models import (
+    Application,
+    Attachment,
+    ChatName,
+    ExportCursor,
+    User,
+    UserInfo,
+    async_session,
+    engine,
+)
+from app.database.writer import writer
 from app.logger import setup_logger
 from app.roles import Role
+from app.utils.cache import MISSING
 from app.utils.errors import DBKeyError, SameDataError
+from app.utils.export import (
+    EXPORT_BATCH,
+    GzipSpool,
+    batch_file,
+    build_xlsx,
+    export_slot,
+    run_export,
+    spool,
+    spooled_bytes,
+    write_batch,
+)
 
 logger = setup_logger(__name__)
 
+# Заголовки excel таблиц
+APPEALS_HEADER = [
+    "Id",
+    "Полное имя",
+    "Контакт",
+    "Дата обращения",
+    "Категория",
+    "Обращение",
+    "Доп. информация",
+    "Приложения",
+]
+BAN_USERS_HEADER = ["Id", "Начало бана", "Конец бана", "Причина бана", "Кем забанен"]
+
+# Обращения моложе этого времени ещё могут быть в незакоммиченной пачке записи
+# и не попадают в выгрузку, иначе курсор перескочил бы через них
+EXPORT_SETTLE = timedelta(seconds=int(getenv("EXPORT_SETTLE_SECONDS") or 5))
+
+
+async def load_user_context(user_id):
+    """Получение user и его профиля из кеша или одним запросом.
+
+    Объекты отвязываются от сессии, чтобы их можно было безопасно кешировать.
+    Кеши сбрасываются очередью записи и NOTIFY, как и user_cache.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+
+    Returns:
+        tuple[User | None, UserInfo | None]: Пользователь и профиль.
+    """
+    db_user, profile = user_cache.get(user_id), profile_cache.get(user_id)
+    if db_user is not MISSING and profile is not MISSING:
+        return db_user, profile
+    stmt = (
+        select(User, UserInfo)
+        .outerjoin(UserInfo, UserInfo.userId == User.id)
+        .where(User.id == user_id)
+    )
+    async with async_session() as session:
+        row = (await session.execute(stmt)).first()
+        db_user, profile = row if row else (None, None)
+        session.expunge_all()
+    user_cache.set(user_id, db_user)
+    profile_cache.set(user_id, profile)
+    return db_user, profile
+
 
 async def get_user(user_id):
     """Получение объекта user по id.
 
+    Результат (в том числе отсутствие user) кешируется в user_cache.
+
     Args:
         user_id (int): Id пользователя.
 
@@ -24,8 +108,12 @@ async def get_user(user_id):
         User: Объект таблицы User.
     """
     # logger.info(f"Получение user (id={user_id})")
+    user = user_cache.get(user_id)
+    if user is not MISSING:
+        return user
     async with async_session() as session:
         user = await session.scalar(select(User).where(User.id == user_id))
+        user_cache.set(user_id, user)
         return user
 
 
@@ -45,52 +133,98 @@ async def get_users(conditions):
         return users.all()
 
 
-async def set_user(user_id):
-    """Установка user в случае его отсутствия.
+async def get_moderators_page(page: int, page_size: int):
+    """Получение одной страницы модераторов.
+
+    Номер страницы ограничивается последней существующей страницей.
 
     Args:
-        user_id (int): Идентификатор пользователя.
+        page (int): Номер страницы, начиная с 1.
+        page_size (int): Размер страницы.
+
+    Returns:
+        tuple[Sequence[User], int, int]: Модераторы страницы, их общее количество и номер страницы.
     """
-    logger.info(f"Установка user (id={user_id})")
+    logger.info(f"Получение страницы {page} модераторов")
+    is_moderator = User.role == Role.MODERATOR.value
     async with async_session() as session:
-        user = await get_user(user_id)
+        total = await session.scalar(select(func.count()).select_from(User).where(is_moderator))
+        page = max(1, min(page, ceil(total / page_size)))
+        stmt = (
+            select(User)
+            .where(is_moderator)
+            .order_by(User.id)
+            .limit(page_size)
+            .offset(page_size * (page - 1))
+        )
+        users = await session.scalars(stmt)
+        return users.all(), total, page
 
-        if not user:
-            logger.info(f"User (id={user_id}) не существует. Добавляем...")
-            session.add(User(id=user_id))
-            await session.commit()
-        else:
-            logger.info(f"User (id={user_id}) уже существует")
 
+async def get_moderator_ids() -> list[int]:
+    """Получение идентификаторов модераторов и администраторов.
 
-async def ban_user(user_id, data: dict):
-    """Блокировка пользователя.
+    Returns:
+        list[int]: Идентификаторы пользователей.
+    """
+    async with async_session() as session:
+        ids = await session.scalars(select(User.id).where(User.role >= Role.MODERATOR.value))
+        ids = set(ids)
+    if getenv("ADMIN"):
+        ids.add(int(getenv("ADMIN")))
+    return sorted(ids)
+
+
+async def set_user(user_id, wait=True):
+    """Установка user в случае его отсутствия.
 
     Args:
         user_id (int): Идентификатор пользователя.
-        data (dict): Данные бана.
+        wait (bool, optional): Дождаться commit. Defaults to True.
 
-    Raises:
-        DBKeyError: Ошибка отсутствия ключа в БД.
+    Returns:
+        asyncio.Future: Завершение записи.
+    """
+    logger.debug(f"Установка user (id={user_id})")
+    return await _write(User, {"id": user_id}, wait)
+
+
+async def ban_users(user_ids: list[int], data: dict):
+    """Блокировка (или разблокировка при term=0) пользователей одним запросом.
+
+    Args:
+        user_ids (list[int]): Идентификаторы пользователей.
+        data (dict): Данные бана.
 
     Returns:
-        datetime: Окончание бана.
+        tuple[list[int], date]: Заблокированные пользователи и окончание бана.
     """
     logger.info(
-        f"Бан user (id={user_id}) на {data.get("term")} дней по причине {data.get("reason")}"
+        f"Бан {len(user_ids)} users на {data.get("term")} дней по причине {data.get("reason")}"
     )
+    ban_start = datetime.now(timezone.utc)
+    ban_end = ban_start + timedelta(days=data.get("term"))
+    if not user_ids:
+        return [], ban_end.date()
     async with async_session() as session:
-        user = await session.scalar(select(User).where(User.id == user_id))
-        if not user:
-            raise DBKeyError()
-        user.banBy = data.get("ban_by")
-        ban_start = datetime.now(timezone.utc)
-        ban_end = ban_start + timedelta(days=data.get("term"))
-        user.banStart = ban_start
-        user.banEnd = ban_end
-        user.banReason = data.get("reason")
+        banned = list(
+            await session.scalars(
+                update(User)
+                .where(User.id == any_(literal(user_ids, ARRAY(BigInteger))))
+                .values(
+                    banBy=data.get("ban_by"),
+                    banStart=ban_start,
+                    banEnd=ban_end,
+                    banReason=data.get("reason"),
+                )
+                .returning(User.id)
+            )
+        )
+        if banned:
+            await notify_user_changed(session, *banned)
         await session.commit()
-        return ban_end.date()
+    user_cache.pop(*banned)
+    return banned, ban_end.date()
 
 
 async def update_role(user_id, new_role: Role):
@@ -112,77 +246,88 @@ async def update_role(user_id, new_role: Role):
         if user.role == new_role.value or user.role == Role.ADMIN.value:
             raise SameDataError()
         user.role = new_role.value
+        await notify_user_changed(session, user_id)
         await session.commit()
+        user_cache.pop(user_id)
 
 
-async def get_profile(user_id):
-    """Получение личных данных пользователя.
+async def set_profile(user_id, new_profile: dict, wait=True):
+    """Установка личных данных пользователя.
 
     Args:
         user_id (int): Идентификатор пользователя.
+        new_profile (dict): Имя, контакт.
+        wait (bool, optional): Дождаться commit. Defaults to True.
 
     Returns:
-        UserInfo: Объект таблицы UserInfo.
+        asyncio.Future: Завершение записи.
     """
-    logger.info(f"Получение профиля user (id={user_id})")
-    async with async_session() as session:
-        profile = await session.scalar(select(UserInfo).where(UserInfo.userId == user_id))
-        return profile
+    logger.info(f"Установка профиля user (id={user_id})")
+    row = {
+        "userId": user_id,
+        "fullName": new_profile.get("full_name")[: UserInfoLen.FULLNAME],
+        "contact": new_profile.get("contact")[: UserInfoLen.CONTACT],
+    }
+    return await _write(UserInfo, row, wait)
 
 
-async def set_profile(user_id, new_profile: dict):
-    """Установка личных данных пользователя.
+async def add_application(user_id, msg_id, data: dict, wait=True):
+    """Добавление обращения.
 
     Args:
         user_id (int): Идентификатор пользователя.
-        new_profile (dict): Имя, контакт.
+        msg_id (int): Идентификатор сообщения.
+        data (dict): Данные обращения.
+        wait (bool, optional): Дождаться commit. Defaults to True.
+
+    Returns:
+        asyncio.Future: Завершение записи.
     """
-    fullName = new_profile.get("full_name")[: UserInfoLen.FULLNAME]
-    contact = new_profile.get("contact")[: UserInfoLen.CONTACT]
-    async with async_session() as session:
-        profile = await session.scalar(select(UserInfo).where(UserInfo.userId == user_id))
-        if profile:
-            logger.info(f"Обновление профиля user (id={user_id})")
-            profile.fullName = fullName
-            profile.contact = contact
-        else:
-            logger.info(f"Установка профиля user (id={user_id})")
-            session.add(
-                UserInfo(
-                    userId=user_id,
-                    fullName=fullName,
-                    contact=contact,
-                )
-            )
-        await session.commit()
+    logger.info(f"Добавление обращения user (id={user_id})")
+    row = {
+        "msgId": msg_id,
+        "userId": user_id,
+        "category": data.get("category"),
+        "address": data.get("address")[: AppLen.ADDRESS],
+        "body": data.get("body", "")[: AppLen.BODY],
+        "police": data.get("police")[: AppLen.POLICE],
+        "attachments": data.get("attachments", "")[: AppLen.ATTACHMENTS],
+    }
+    return await _write(Application, row, wait)
 
 
-async def add_application(user_id, msg_id, data: dict):
-    """Добавление обращения.
+async def _write(table, row: dict, wait: bool):
+    """Запись строки через очередь отложенной записи.
+
+    Args:
+        table (type[Base]): Модель таблицы.
+        row (dict): Значения столбцов.
+        wait (bool): Дождаться commit.
+
+    Returns:
+        asyncio.Future: Завершение записи.
+    """
+    future = writer.submit(table, row)
+    if wait:
+        await future
+    return future
+
+
+def role_of(user_id, user: User | None) -> Role:
+    """Роль уже загруженного пользователя.
 
     Args:
         user_id (int): Идентификатор пользователя.
-        msg_id (int): Идентификатор сообщения.
-        data (dict): Данные обращения.
+        user (User | None): Объект таблицы User.
+
+    Returns:
+        Role: Роль пользователя.
     """
-    logger.info(f"Добавление обращения user (id={user_id})")
-    address = data.get("address")[: AppLen.ADDRESS]
-    body = data.get("body", "")[: AppLen.BODY]
-    police = data.get("police")[: AppLen.POLICE]
-    attachments = data.get("attachments", "")[: AppLen.ATTACHMENTS]
-    async with async_session() as session:
-        session.add(
-            Application(
-                msgId=msg_id,
-                userId=user_id,
-                category=data.get("category"),
-                address=address,
-                body=body,
-                police=police,
-                attachments=attachments,
-            )
-        )
-        await session.commit()
+    if not user:
+        return Role.USER
+    if getenv("ADMIN") == str(user_id):
+        return Role.ADMIN
+    return Role.from_value(user.role)
 
 
 async def get_role(user_id, quiet=True) -> Role:
@@ -200,145 +345,343 @@ async def get_role(user_id, quiet=True) -> Role:
     """
     # logger.info(f"Получение роли user (id={user_id}), quiet={quiet}")
     user = await get_user(user_id)
-    if not user:
-        if quiet:
-            return Role.USER
-        else:
-            raise DBKeyError()
-    if getenv("ADMIN") == str(user_id):
-        return Role.ADMIN
-    return Role.from_value(user.role)
+    if not user and not quiet:
+        raise DBKeyError()
+    return role_of(user_id, user)
+
 
+async def get_roles(user_ids: list[int]) -> dict[int, Role]:
+    """Получение ролей пользователей одним запросом.
 
-async def get_lastDbReq():
-    """Получение даты последнего скачивания БД.
+    Args:
+        user_ids (list[int]): Идентификаторы пользователей.
 
     Returns:
-        datetime: Дата последнего скачивания БД.
+        dict[int, Role]: Роли найденных пользователей.
     """
-    logger.info("Получение lastDbReq")
+    if not user_ids:
+        return {}
     async with async_session() as session:
-        after_date = await session.scalar(select(func.max(User.lastDbReq)))
-        if not after_date:
-            logger.info("lastDbReq=NULL. Устанавливаем минимальную")
-            after_date = datetime.min
-        return after_date
+        rows = await session.execute(
+            select(User.id, User.role).where(User.id == any_(literal(user_ids, ARRAY(BigInteger))))
+        )
+        return {row.id: role_of(row.id, row) for row in rows}
 
 
-async def get_applications(only_new):
-    """Получение обращений.
+def _app_key():
+    """Ключ порядка выгрузки обращений (dt, userId, msgId)."""
+    return Application.dt, Application.userId, Application.msgId
+
+
+def _key_bound(key):
+    """Ключ обращения литералами, чтобы Postgres использовал его как границу индекса.
 
     Args:
-        only_new (bool): Только новые.
+        key (Row): (dt, userId, msgId).
+
+    Returns:
+        Tuple: Кортеж литералов.
+    """
+    return tuple_(*(literal(value, column.type) for value, column in zip(key, _app_key())))
+
+
+async def _export_position(session: AsyncSession, user_id):
+    """Позиция курсора выгрузки модератора.
+
+    Args:
+        session (AsyncSession): Сессия.
+        user_id (int): Идентификатор модератора.
+
+    Returns:
+        Row | None: (dt, appUserId, msgId) или None, если модератор ещё не выгружал.
+    """
+    stmt = select(ExportCursor.dt, ExportCursor.appUserId, ExportCursor.msgId).where(
+        ExportCursor.userId == user_id
+    )
+    return (await session.execute(stmt)).first()
+
+
+def _after(position):
+    """Условие "обращение после позиции курсора".
+
+    Args:
+        position (Row | None): Позиция курсора.
+
+    Returns:
+        ColumnElement: Условие на ключ обращения.
+    """
+    if position is None:
+        return true()
+    return tuple_(*_app_key()) > _key_bound(position)
+
+
+def _settled(dt: datetime):
+    """Условие "обращение могло быть выгружено на момент dt".
+
+    Args:
+        dt (datetime): Время выгрузки.
+
+    Returns:
+        ColumnElement: Условие на Application.dt.
+    """
+    return Application.dt < dt - EXPORT_SETTLE
+
+
+async def count_applications(user_id):
+    """Подсчёт новых для модератора и всех обращений.
+
+    Позиция курсора читается отдельно, новые считаются диапазоном индекса от неё.
+
+    Args:
+        user_id (int): Идентификатор модератора.
 
     Returns:
-        Sequence[Application]: Список обращений.
+        tuple[int, int]: Количество новых и всех обращений.
     """
-    logger.info(f"Получение обращений (only_new={only_new})")
+    logger.debug(f"Подсчёт обращений для user (id={user_id})")
     async with async_session() as session:
-        after_date = datetime.min
-        if only_new:
-            after_date = await get_lastDbReq()
-        stmt = select(Application).where(Application.dt > after_date)
-        appeals = await session.scalars(stmt)
-        return appeals.all()
+        position = await _export_position(session, user_id)
+        count = select(func.count()).select_from(Application)
+        stmt = select(
+            count.where(_after(position), _settled(datetime.now(timezone.utc))).scalar_subquery(),
+            count.scalar_subquery(),
+        )
+        new_count, all_count = (await session.execute(stmt)).one()
+        return new_count, all_count
+
+
+async def _last_appeal(session: AsyncSession, position, dt: datetime):
+    """Ключ последнего обращения, попадающего в выгрузку.
+
+    Args:
+        session (AsyncSession): Сессия выгрузки.
+        position (Row | None): Позиция курсора, None - выгрузка всех.
+        dt (datetime): Время выгрузки.
+
+    Returns:
+        Row | None: (dt, userId, msgId) или None, если выгружать нечего.
+    """
+    query = (
+        select(*_app_key())
+        .join(UserInfo, Application.userId == UserInfo.userId)
+        .where(_after(position), _settled(dt))
+        .order_by(*(column.desc() for column in _app_key()))
+        .limit(1)
+    )
+    return (await session.execute(query)).first()
+
+
+def _appeals_query(position, last):
+    """Запрос строк выгрузки обращений после position до last включительно.
+
+    Args:
+        position (Row | None): Позиция курсора, None - выгрузка всех.
+        last (Row): Ключ последнего обращения выгрузки.
+
+    Returns:
+        Select: Запрос со столбцами APPEALS_HEADER.
+    """
+    columns = (
+        UserInfo.userId,
+        UserInfo.fullName,
+        UserInfo.contact,
+        Application.dt,
+        Application.category,
+        Application.body,
+        Application.police,
+        Application.attachments,
+    )
+    return (
+        select(*(column.label(name) for column, name in zip(columns, APPEALS_HEADER)))
+        .join(UserInfo, Application.userId == UserInfo.userId)
+        .where(_after(position), tuple_(*_app_key()) <= _key_bound(last))
+        .order_by(*_app_key())
+    )
+
+
+async def _advance_cursor(user_id, last, dt: datetime):
+    """Сдвиг курсора выгрузки модератора и фиксация выгрузки.
+
+    Вызывается после доставки файла, выгрузка всех обращений не откатывает
+    курсор назад.
+
+    Args:
+        user_id (int): Идентификатор модератора.
+        last (Row): Ключ последнего выгруженного обращения.
+        dt (datetime): Время выгрузки.
+    """
+    position = {"dt": last.dt, "appUserId": last.userId, "msgId": last.msgId}
+    stmt = insert(ExportCursor).values(userId=user_id, **position)
+    excluded = tuple_(stmt.excluded.dt, stmt.excluded.appUserId, stmt.excluded.msgId)
+    current = tuple_(ExportCursor.dt, ExportCursor.appUserId, ExportCursor.msgId)
+    async with async_session() as session:
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ExportCursor.userId], set_=position, where=excluded > current
+            )
+        )
+        await session.execute(update(User).where(User.id == user_id).values(lastDbReq=dt))
+        await notify_user_changed(session, user_id)
+        await session.commit()
+    user_cache.pop(user_id)
+
+
+async def _fetch_batches(session: AsyncSession, query, file) -> int:
+    """Чтение строк выгрузки пачками кортежей в файл пачек для пула процессов.
+
+    В памяти бота держится не больше одной пачки.
+
+    Args:
+        session (AsyncSession): Сессия выгрузки.
+        query (Select): Запрос с yield_per.
+        file (BinaryIO): Файл пачек.
+
+    Returns:
+        int: Количество строк.
+    """
+    rows = 0
+    result = await session.stream(query)
+    async for partition in result.partitions():
+        write_batch(file, [tuple(row) for row in partition])
+        rows += len(partition)
+    file.flush()
+    return rows
 
 
 async def save_appeals(user_id, only_new):
     """Генерация excel таблицы БД Application.
 
+    Строки читаются серверным курсором в порядке (dt, userId, msgId) пачками
+    кортежей в файл пачек, книга собирается из него в пуле процессов. Новые -
+    обращения после курсора выгрузки модератора. Курсор сдвигается на последнее
+    выгруженное вызовом commit после доставки файла.
+
     Args:
         user_id (int): Идентификатор пользователя.
         only_new (bool): Только новые.
 
     Returns:
-        str: Excel file path.
+        tuple[str, bytes, Callable[[], Awaitable]] | None: Имя и содержимое файла xlsx, commit.
     """
     logger.info(f"Получение обращений user'ом (id={user_id}) для сохранения (only_new={only_new})")
-    async with async_session() as session:
+    async with export_slot(), async_session() as session:
         dt = datetime.now(timezone.utc)
-        after_date = datetime.min
-        if only_new:
-            after_date = await get_lastDbReq()
-        query = (
-            select(UserInfo, Application)
-            .join(UserInfo, Application.userId == UserInfo.userId)
-            .where(Application.dt > after_date)
-            .order_by(Application.dt.asc())
-        )
-        appeals = await session.execute(query)
-        data = []
-        for user_info, application in appeals:
-            user_info: UserInfo
-            application: Application
-            data.append(
-                {
-                    "Id": user_info.userId,
-                    "Полное имя": user_info.fullName,
-                    "Контакт": user_info.contact,
-                    "Дата обращения": application.dt.replace(tzinfo=None),
-                    "Категория": application.category,
-                    "Обращение": application.body,
-                    "Доп. информация": application.police,
-                    "Приложения": application.attachments,
-                }
-            )
-        if not data:
+        position = await _export_position(session, user_id) if only_new else None
+        last = await _last_appeal(session, position, dt)
+        if not last:
             return None
-        df = pd.DataFrame(data)
+        query = _appeals_query(position, last).execution_options(yield_per=EXPORT_BATCH)
+        with batch_file() as file:
+            await _fetch_batches(session, query, file)
+            # Соединение не нужно на время генерации
+            await session.commit()
+            logger.info("Генерация excel")
+            data = await run_export(build_xlsx, APPEALS_HEADER, file.name)
         file_name = f"Appeals {dt.strftime('%y.%m.%d_%H-%M-%S')}.xlsx"
-        logger.info("Генерация excel")
-        df.to_excel(file_name, index=False)
-        await session.execute(update(User).where(User.id == user_id).values(lastDbReq=dt))
-        await session.commit()
-        return file_name
+        return file_name, data, partial(_advance_cursor, user_id, last, dt)
 
 
-async def save_ban_users(user_id):
-    """Генерация excel таблицы БД User.
+async def save_appeals_csv(user_id, only_new):
+    """Выгрузка обращений в CSV через COPY со сжатием gzip.
+
+    Строки не разбираются на стороне бота: вывод COPY ... TO STDOUT
+    сжимается по мере чтения и пишется во временный файл.
 
     Args:
         user_id (int): Идентификатор пользователя.
+        only_new (bool): Только новые.
 
     Returns:
-        str: Excel file path.
+        tuple[str, bytes, Callable[[], Awaitable]] | None: Имя и содержимое файла csv.gz, commit.
     """
-    logger.info(f"Получение таблицы excel User user'ом (id={user_id})")
-    async with async_session() as session:
+    logger.info(f"Получение обращений user'ом (id={user_id}) в csv (only_new={only_new})")
+    async with export_slot(), async_session() as session:
         dt = datetime.now(timezone.utc)
-        users = await session.scalars(select(User).where(User.banEnd > dt))
-        data = []
-        for user in users.all():
-            data.append(
-                {
-                    "Id": user.id,
-                    "Начало бана": user.banStart.replace(tzinfo=None),
-                    "Конец бана": user.banEnd.replace(tzinfo=None),
-                    "Причина бана": user.banReason,
-                    "Кем забанен": user.banBy,
-                }
+        position = await _export_position(session, user_id) if only_new else None
+        last = await _last_appeal(session, position, dt)
+        if not last:
+            return None
+        compiled = _appeals_query(position, last).compile(dialect=engine.dialect)
+        args = [compiled.params[name] for name in compiled.positiontup]
+        connection = await session.connection()
+        raw = (await connection.get_raw_connection()).driver_connection
+
+        file_name = f"Appeals {dt.strftime('%y.%m.%d_%H-%M-%S')}.csv.gz"
+        with spool() as file:
+            output = GzipSpool(file)
+            await raw.copy_from_query(
+                str(compiled), *args, output=output.write, format="csv", header=True
             )
-        if not len(data):
-            return ""
-        df = pd.DataFrame(data)
-        file_name = f"Banned {dt.strftime('%y.%m.%d_%H-%M-%S')}.xlsx"
-        logger.info("Генерация excel")
-        df.to_excel(file_name, index=False)
-        return file_name
+            await session.commit()
+            await output.close()
+            data = spooled_bytes(file)
+        return file_name, data, partial(_advance_cursor, user_id, last, dt)
 
 
-async def is_banned(user_id):
+async def save_ban_users(user_id):
+    """Генерация excel таблицы БД User.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+
+    Returns:
+        tuple[str, bytes] | None: Имя и содержимое файла xlsx.
+    """
+    logger.info(f"Получение таблицы excel User user'ом (id={user_id})")
+    dt = datetime.now(timezone.utc)
+    query = (
+        select(User.id, User.banStart, User.banEnd, User.banReason, User.banBy)
+        .where(User.banEnd > dt)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+    async with export_slot():
+        with batch_file() as file:
+            async with async_session() as session:
+                rows = await _fetch_batches(session, query, file)
+            if not rows:
+                return None
+            logger.info("Генерация excel")
+            data = await run_export(build_xlsx, BAN_USERS_HEADER, file.name)
+    return f"Banned {dt.strftime('%y.%m.%d_%H-%M-%S')}.xlsx", data
+
+
+async def is_banned(user_id, user: User | None = MISSING):
     """Проверка на наличие бана у пользователя.
 
     Args:
         user_id (int): Идентификатор пользователя.
+        user (User | None, optional): Уже загруженный user. Defaults to MISSING.
 
     Returns:
         bool: isBan
     """
-    logger.info(f"Проверка бана у user (id={user_id})")
-    user = await get_user(user_id)
-    return user.regAt and (datetime.now(timezone.utc) < user.regAt)
+    logger.debug(f"Проверка бана у user (id={user_id})")
+    if user is MISSING:
+        user = await get_user(user_id)
+    return bool(user and user.regAt and (datetime.now(timezone.utc) < user.regAt))
+
+
+async def set_hash_links(links: list[str]):
+    """Запись соответствий хеш-ссылка для всех приложений обращения.
+
+    Все ссылки записываются одним INSERT, уже существующие пропускаются.
+
+    Args:
+        links (list[str]): Ссылки на приложения тг.
+
+    Returns:
+        list[str]: Хеши в порядке ссылок.
+    """
+    logger.debug(f"Генерация хешей для {len(links)} приложений")
+    hashes = [hashlib.md5(link.encode()).hexdigest() for link in links]
+    async with async_session() as session:
+        await session.execute(
+            insert(Attachment)
+            .values([{"hash": h, "link": link} for h, link in zip(hashes, links)])
+            .on_conflict_do_nothing()
+        )
+        await session.commit()
+    return hashes
 
 
 async def set_hash_link(link: str):
@@ -350,13 +693,42 @@ async def set_hash_link(link: str):
     Returns:
         str: Хеш.
     """
-    logger.info(f"Генерация хеша для приложения (link={link})")
-    async with async_session() as session:
-        hash_str = str(hashlib.md5(link.encode()).hexdigest())
-        session.add(Attachment(hash=hash_str, link=link))
-        await session.commit()
+    return (await set_hash_links([link]))[0]
+
+
+async def set_chat_name(user_id, username: str | None, full_name: str | None, wait=False):
+    """Запись имени пользователя тг в справочник.
 
-        return hash_str
+    Args:
+        user_id (int): Идентификатор пользователя.
+        username (str | None): Username тг.
+        full_name (str | None): Имя в тг.
+        wait (bool, optional): Дождаться commit. Defaults to False.
+
+    Returns:
+        asyncio.Future: Завершение записи.
+    """
+    row = {
+        "userId": user_id,
+        "username": username,
+        "fullName": full_name[: ChatNameLen.FULLNAME] if full_name else None,
+        "updatedAt": datetime.now(timezone.utc),
+    }
+    return await _write(ChatName, row, wait)
+
+
+async def get_chat_names(user_ids):
+    """Получение имён пользователей тг из справочника.
+
+    Args:
+        user_ids (Iterable[int]): Идентификаторы пользователей.
+
+    Returns:
+        dict[int, ChatName]: Имена найденных пользователей.
+    """
+    async with async_session() as session:
+        names = await session.scalars(select(ChatName).where(ChatName.userId.in_(user_ids)))
+        return {name.userId: name for name in names}
 
 
 async def get_hash_link(hash: str):
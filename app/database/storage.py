@@ -0,0 +1,104 @@
+import copy
+from typing import Any, Dict
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database.cache import fsm_cache, notify_fsm_changed
+from app.database.models import FsmState, async_session
+from app.logger import setup_logger
+from app.utils.cache import MISSING, TTLCache
+
+logger = setup_logger(__name__)
+
+
+class PgStorage(BaseStorage):
+    """Хранилище FSM в PostgreSQL.
+
+    Состояния переживают перезапуск и доступны всем экземплярам бота.
+    Прочитанные и записанные значения кешируются локально, запись сбрасывает
+    кеш остальных процессов через NOTIFY.
+    """
+
+    def __init__(self, cache: TTLCache):
+        """Инициализация хранилища.
+
+        Args:
+            cache (TTLCache): Локальный кеш состояний.
+        """
+        self._cache = cache
+
+    @staticmethod
+    def _key(key: StorageKey):
+        return key.bot_id, key.chat_id, key.user_id
+
+    async def _load(self, key: StorageKey):
+        """Получение состояния и данных из кеша или БД.
+
+        Returns:
+            tuple[str | None, dict]: Состояние и данные.
+        """
+        cached = self._cache.get(self._key(key))
+        if cached is not MISSING:
+            return cached
+        async with async_session() as session:
+            row = (
+                await session.execute(
+                    select(FsmState.state, FsmState.data).where(
+                        FsmState.botId == key.bot_id,
+                        FsmState.chatId == key.chat_id,
+                        FsmState.userId == key.user_id,
+                    )
+                )
+            ).first()
+        cached = (row.state, row.data or {}) if row else (None, {})
+        self._cache.set(self._key(key), cached)
+        return cached
+
+    async def _upsert(self, key: StorageKey, **values):
+        """Запись состояния или данных одним INSERT ... ON CONFLICT с уведомлением."""
+        async with async_session() as session:
+            await session.execute(
+                insert(FsmState)
+                .values(botId=key.bot_id, chatId=key.chat_id, userId=key.user_id, **values)
+                .on_conflict_do_update(
+                    index_elements=[FsmState.botId, FsmState.chatId, FsmState.userId],
+                    set_=values,
+                )
+            )
+            await notify_fsm_changed(session, self._key(key))
+            await session.commit()
+
+    def _update_cache(self, key: StorageKey, index: int, value):
+        """Обновление закешированной части записи без обращения к БД."""
+        cached = self._cache.get(self._key(key))
+        if cached is not MISSING:
+            cached = list(cached)
+            cached[index] = value
+            self._cache.set(self._key(key), tuple(cached))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        await self._upsert(key, state=state)
+        self._update_cache(key, 0, state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state, _ = await self._load(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        data = copy.copy(data)
+        await self._upsert(key, data=data)
+        self._update_cache(key, 1, data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._load(key)
+        return copy.copy(data)
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+
+storage = PgStorage(fsm_cache)
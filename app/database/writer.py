@@ -0,0 +1,187 @@
+import asyncio
+from os import getenv
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database.cache import invalidate_users, notify_user_changed
+from app.database.models import Application, ChatName, User, UserInfo, async_session
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Порядок записи таблиц внутри одной транзакции (с учётом внешних ключей)
+TABLES = (User, UserInfo, Application, ChatName)
+
+# Таблицы, строки которых обновляются при конфликте: ключ и обновляемые столбцы
+UPSERTS = {
+    UserInfo: ("userId", ("fullName", "contact")),
+    ChatName: ("userId", ("username", "fullName", "updatedAt")),
+}
+
+
+def _statement(table, rows: list[dict]):
+    """Многострочный INSERT ... ON CONFLICT для таблицы.
+
+    Args:
+        table (type[Base]): Модель таблицы.
+        rows (list[dict]): Строки.
+
+    Returns:
+        Insert: Запрос.
+    """
+    stmt = insert(table).values(rows)
+    if table in UPSERTS:
+        key, columns = UPSERTS[table]
+        return stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={column: stmt.excluded[column] for column in columns},
+        )
+    return stmt.on_conflict_do_nothing()
+
+
+def _resolve(future: asyncio.Future, error: Exception | None = None):
+    """Завершение future записи, если ожидающий его ещё не отменил.
+
+    Args:
+        future (asyncio.Future): Завершение записи.
+        error (Exception | None, optional): Ошибка записи. Defaults to None.
+    """
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+        # Ошибка передана ожидающим, сам future может быть никем не прочитан
+        future.exception()
+
+
+class WriteBehindQueue:
+    """Очередь отложенной записи с групповым commit.
+
+    Записи копятся не дольше interval секунд или до max_rows строк и
+    фиксируются одной транзакцией с многострочными INSERT ... ON CONFLICT.
+    """
+
+    def __init__(self, interval: float = 0.05, max_rows: int = 500):
+        """Инициализация очереди.
+
+        Args:
+            interval (float, optional): Максимальное ожидание пачки. Defaults to 0.05.
+            max_rows (int, optional): Максимальный размер пачки. Defaults to 500.
+        """
+        self.interval = interval
+        self.max_rows = max_rows
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    def start(self):
+        """Запуск фоновой записи."""
+        if self._task is None:
+            self._closed = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Запись оставшихся строк и остановка."""
+        if self._task is None:
+            return
+        self._closed = True
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        logger.info("Очередь записи остановлена")
+
+    def submit(self, table, row: dict) -> asyncio.Future:
+        """Постановка строки в очередь записи.
+
+        Args:
+            table (type[Base]): Модель таблицы (User, UserInfo, Application).
+            row (dict): Значения столбцов.
+
+        Raises:
+            RuntimeError: Очередь остановлена.
+
+        Returns:
+            asyncio.Future: Завершается после commit строки.
+        """
+        if self._closed:
+            raise RuntimeError("Очередь записи остановлена")
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((table, row, future))
+        return future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.interval
+            while len(batch) < self.max_rows:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except TimeoutError:
+                    break
+                if item is None:
+                    await self._flush(batch)
+                    return
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        """Запись пачки с защитой цикла записи от любых ошибок."""
+        try:
+            await self._flush_batch(batch)
+        except Exception as ex:
+            logger.error(f"Ошибка записи пачки из {len(batch)} строк - {ex}")
+            for _, _, future in batch:
+                _resolve(future, ex)
+
+    async def _flush_batch(self, batch: list):
+        """Запись пачки одной транзакцией, при ошибке - построчно."""
+        try:
+            await self._write(batch)
+        except Exception as ex:
+            logger.error(f"Ошибка групповой записи {len(batch)} строк - {ex}")
+            for item in batch:
+                try:
+                    await self._write([item])
+                except Exception as ex:
+                    _resolve(item[2], ex)
+                else:
+                    _resolve(item[2])
+            return
+        for _, _, future in batch:
+            _resolve(future)
+
+    async def _write(self, batch: list):
+        rows = {table: [] for table in TABLES}
+        for table, row, _ in batch:
+            rows[table].append(row)
+        # Повторное обновление одной строки в одном upsert запрещено, оставляем последнее
+        for table, (key, _) in UPSERTS.items():
+            rows[table] = list({row[key]: row for row in rows[table]}.values())
+        # Изменённые пользователи и профили, их кеши сбрасываются во всех процессах
+        user_ids = list(
+            {row["id"] for row in rows[User]} | {row["userId"] for row in rows[UserInfo]}
+        )
+
+        async with async_session() as session:
+            for table in TABLES:
+                if rows[table]:
+                    await session.execute(_statement(table, rows[table]))
+            if user_ids:
+                await notify_user_changed(session, *user_ids)
+            await session.commit()
+        invalidate_users(*user_ids)
+        if len(batch) > 1:
+            logger.info(f"Групповая запись {len(batch)} строк")
+
+
+writer = WriteBehindQueue(
+    interval=int(getenv("WRITE_BATCH_MS") or 50) / 1000,
+    max_rows=int(getenv("WRITE_BATCH_ROWS") or 500),
+)
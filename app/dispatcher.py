@@ -0,0 +1,24 @@
+from aiogram import Dispatcher
+
+from app.database.storage import storage
+from app.middlewares import LoggingMiddleware, UserContextMiddleware, album_middleware
+from app.roles.admin import admin
+from app.roles.moderator import moderator
+from app.roles.user import user
+
+
+def build_dispatcher():
+    """Настройка диспетчера: подключение роутеров и middleware.
+
+    Returns:
+        Dispatcher: Диспетчер, обрабатывающий обновления.
+    """
+    user.message.middleware(album_middleware)
+
+    dp = Dispatcher(storage=storage)
+    dp.include_routers(user, moderator, admin)
+    dp.callback_query.outer_middleware(UserContextMiddleware())
+    dp.message.outer_middleware(UserContextMiddleware())
+    dp.callback_query.middleware(LoggingMiddleware())
+    dp.message.middleware(LoggingMiddleware())
+    return dp
@@ -1,8 +1,10 @@
 from aiogram.filters import Filter
 from aiogram.types import Message
 
-from app.database.requests import get_role
+from app.database.models import User
+from app.database.requests import get_role, role_of
 from app.roles import Role
+from app.utils.cache import MISSING
 
 
 class RoleFilter(Filter):
@@ -20,14 +22,18 @@ class RoleFilter(Filter):
         """
         self.role = role
 
-    async def __call__(self, message: Message):
+    async def __call__(self, message: Message, db_user: User | None = MISSING):
         """Фильтрация роли.
 
         Args:
             message (Message): Объект сообщения.
+            db_user (User | None, optional): User из UserContextMiddleware. Defaults to MISSING.
 
         Returns:
             bool: Доступность для заданной роли.
         """
-        user_role = await get_role(message.from_user.id)
+        if db_user is MISSING:
+            user_role = await get_role(message.from_user.id)
+        else:
+            user_role = role_of(message.from_user.id, db_user)
         return user_role.value >= self.role.value
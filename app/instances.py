@@ -3,6 +3,8 @@ from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
 import os
 
+from app.utils.scheduler import scheduler
+
 # Global event loop
 loop = asyncio.new_event_loop()
 asyncio.set_event_loop(loop)
@@ -11,3 +13,6 @@ bot = Bot(
     token=os.getenv("TOKEN_BOT"),
     default=DefaultBotProperties(parse_mode="markdown"),
 )
+
+# Лимиты, повторы и объединение удалений для исходящих запросов
+bot.session.middleware(scheduler)
@@ -7,9 +7,10 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 import app.config.labels as label
 from app.config import KEYBOARD_PAGE_SIZE
 from app.database.models import User
-from app.database.requests import get_applications
+from app.database.requests import count_applications
 from app.logger import setup_logger
 from app.roles import Role
+from app.utils.directory import directory
 
 logger = setup_logger(__name__)
 
@@ -111,23 +112,27 @@ async def get_manage_panel(user_type):
     return keyboard.as_markup()
 
 
-async def get_moderators(moders: list[User], cur_page, bot: Bot):
-    """Клавиатура с модераторами.
+async def get_moderators(moders: list[User], cur_page, total, bot: Bot):
+    """Клавиатура со страницей модераторов.
+
+    Args:
+        moders (list[User]): Модераторы текущей страницы.
+        cur_page (int): Номер страницы.
+        total (int): Общее количество модераторов.
+        bot (Bot): Бот.
 
     Returns:
         InlineKeyboardMarkup: Inline кнопки.
     """
-    pages_num = ceil(len(moders) / KEYBOARD_PAGE_SIZE)
-    from_i = KEYBOARD_PAGE_SIZE * (cur_page - 1)
-    to_i = min(len(moders), KEYBOARD_PAGE_SIZE * cur_page)
+    pages_num = ceil(total / KEYBOARD_PAGE_SIZE)
     keyboard = InlineKeyboardBuilder()
 
-    for i in range(from_i, to_i):
-        user = await bot.get_chat(moders[i].id)
+    names = await directory.names(bot, [moder.id for moder in moders])
+    for moder in moders:
         keyboard.row(
             InlineKeyboardButton(
-                text=f"@{user.username}",
-                callback_data=f"moderator_{user.id}_{cur_page}",
+                text=names[moder.id],
+                callback_data=f"moderator_{moder.id}_{cur_page}",
             )
         )
 
@@ -188,14 +193,16 @@ async def get_ban_terms():
     return keyboard.as_markup()
 
 
-async def get_download_appeals():
+async def get_download_appeals(user_id):
     """Клавиатура с выбором загрузки бд.
 
+    Args:
+        user_id (int): Идентификатор модератора.
+
     Returns:
         InlineKeyboardMarkup: Inline кнопки.
     """
-    new_count = len(await get_applications(True))
-    all_count = len(await get_applications(False))
+    new_count, all_count = await count_applications(user_id)
     keyboard = InlineKeyboardBuilder()
     keyboard.row(
         InlineKeyboardButton(
@@ -209,5 +216,11 @@ async def get_download_appeals():
             callback_data="download_all",
         )
     )
+    keyboard.row(
+        InlineKeyboardButton(
+            text=label.DOWNLOAD_ALL_CSV.format(all_count),
+            callback_data="download_all_csv",
+        )
+    )
     keyboard.row(InlineKeyboardButton(text=label.CLOSE, callback_data="close"))
     return keyboard.as_markup()
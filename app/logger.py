@@ -1,30 +1,135 @@
+import atexit
+import json
 import logging
-from datetime import datetime
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import random
 
+LOG_DIR = "../data/logs"
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-def setup_logger(logger_name):
-    """Настройка логгеров.
+_listener: logging.handlers.QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирование записей в JSON lines."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        # Трассировка исключения уже добавлена в текст QueueHandler'ом
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.processName,
+            "msg": record.getMessage(),
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропуск доли записей до INFO включительно по имени логгера.
+
+    Доля берётся по самому длинному совпавшему префиксу имени логгера,
+    WARNING и выше не отбрасываются никогда.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        """Инициализация фильтра.
+
+        Args:
+            rates (dict[str, float]): Доля сохраняемых записей по префиксу логгера.
+        """
+        super().__init__()
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return random.random() < rate
+        return True
+
+
+def parse_rates(value: str) -> dict[str, float]:
+    """Разбор LOG_SAMPLE вида "app.middlewares=0.1,app.database.requests=0.2".
+
+    Args:
+        value (str): Значение переменной окружения.
 
     Returns:
-        Logger: Логгер.
+        dict[str, float]: Доля сохраняемых записей по префиксу логгера.
+    """
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def _file_handler():
+    """Файловый обработчик с ротацией для текущего процесса.
+
+    Основной процесс пишет в bot.log, процессы-обработчики - в
+    bot-worker-N.log, вспомогательные процессы (пул выгрузок) - только в консоль.
+
+    Returns:
+        logging.Handler | None: Обработчик.
     """
-    log_filename = datetime.now().strftime("log_%Y-%m-%d_%H-%M-%S.log")
-
-    if len(logging.getLogger().handlers) > 0:
-        return logging.getLogger(logger_name)
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(f"../data/logs/{log_filename}", mode="w"),
-            logging.StreamHandler(),
-        ],
+    # Имя процесса spawn выставляется до импорта модулей, в отличие от parent_process()
+    name = multiprocessing.current_process().name
+    if name == "MainProcess":
+        filename = "bot.log"
+    elif name.startswith("worker-"):
+        filename = f"bot-{name}.log"
+    else:
+        return None
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    path = os.path.join(LOG_DIR, filename)
+    backups = int(os.getenv("LOG_BACKUPS") or 10)
+    when = os.getenv("LOG_ROTATE_WHEN")
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backups, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        path,
+        maxBytes=int(os.getenv("LOG_MAX_SIZE") or 10) * 1024 * 1024,
+        backupCount=backups,
+        encoding="utf-8",
+    )
+
+
+def _configure():
+    """Настройка корневого логгера через очередь и фоновый поток записи."""
+    global _listener
+    formatter = (
+        JsonFormatter()
+        if os.getenv("LOG_JSON", "").lower() in ("1", "true", "yes")
+        else logging.Formatter(LOG_FORMAT)
     )
+    handlers = [logging.StreamHandler()]
+    file_handler = _file_handler()
+    if file_handler:
+        handlers.append(file_handler)
+    for handler in handlers:
+        handler.setFormatter(formatter)
 
-    # Custom
-    logger = logging.getLogger(logger_name)
-    logger.setLevel(logging.INFO)
+    # Запись на диск и в консоль идёт в отдельном потоке, event loop только кладёт в очередь
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_rates(os.getenv("LOG_SAMPLE") or "")))
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL") or logging.INFO)
+    root.addHandler(queue_handler)
 
     # Aiogram
     logging.getLogger("aiogram").setLevel(logging.ERROR)
@@ -36,4 +141,13 @@ def setup_logger(logger_name):
     logging.getLogger("uvicorn").setLevel(logging.ERROR)
     logging.getLogger("fastapi").setLevel(logging.INFO)
 
-    return logger
+
+def setup_logger(logger_name):
+    """Настройка логгеров.
+
+    Returns:
+        Logger: Логгер.
+    """
+    if _listener is None and not logging.getLogger().handlers:
+        _configure()
+    return logging.getLogger(logger_name)
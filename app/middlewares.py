@@ -1,8 +1,12 @@
 import asyncio
+import time
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, TelegramObject
 from typing import Callable, Dict, Any
+from app.database.requests import load_user_context
 from app.logger import setup_logger
+from app.utils.cache import MISSING, TTLCache
+from app.utils.directory import directory
 
 logger = setup_logger(__name__)
 
@@ -10,42 +14,93 @@ logger = setup_logger(__name__)
 class AlbumMiddleware(BaseMiddleware):
     """Middleware для обработки альбомов.
 
+    Альбом передаётся обработчику, как только его части перестают приходить
+    дольше latency секунд.
+
     Args:
         BaseMiddleware (_type_): _description_
     """
 
-    def __init__(self, latency: float = 0.5):
+    def __init__(
+        self,
+        latency: float = 0.2,
+        max_wait: float = 2,
+        max_parts: int = 10,
+        done_ttl: float = 60,
+    ):
         """Инициализация middleware для обработки альбомов.
 
         Args:
-            latency (float, optional): Задержка между сообщениями в группе. Defaults to 0.5.
+            latency (float, optional): Пауза после последней части альбома. Defaults to 0.2.
+            max_wait (float, optional): Максимальное время сборки альбома. Defaults to 2.
+            max_parts (int, optional): Максимальное количество частей. Defaults to 10.
+            done_ttl (float, optional): Время хранения собранных групп для отбрасывания
+                опоздавших частей. Defaults to 60.
         """
         logger.info("Инициализация middleware для обработки альбомов")
         self.latency = latency
-        self.album_data: Dict[str, list] = {}
+        self.max_wait = max_wait
+        self.max_parts = max_parts
+        self.album_data: Dict[str, dict] = {}
+        self.done = TTLCache(maxsize=10000, ttl=done_ttl)
+        self.albums = 0
+        self.dropped = 0
+        self.assembly_time = 0.0
         super().__init__()
 
     async def __call__(self, handler: Callable, event: Message, data: Dict[str, Any]):
         if not event.media_group_id:
             return await handler(event, data)
-        logger.info("Обнаружено медиа в сообщении")
+        group_id = event.media_group_id
+        album = self.album_data.get(group_id)
+
+        if album is not None or self.done.get(group_id) is not MISSING:
+            if album is None or len(album["parts"]) >= self.max_parts:
+                logger.info(f"Отброшена лишняя часть альбома (media_group_id={group_id})")
+                self.dropped += 1
+                return
+            album["parts"].append(event)
+            album["last"] = time.monotonic()
+            return
+
+        logger.debug("Добавление первого медиа")
+        start = time.monotonic()
+        album = self.album_data[group_id] = {"parts": [event], "last": start}
         try:
-            self.album_data[event.media_group_id].append(event)
+            # Ожидание тишины после последней части, но не дольше max_wait
+            while True:
+                now = time.monotonic()
+                quiet = album["last"] + self.latency - now
+                if quiet <= 0 or now - start >= self.max_wait:
+                    break
+                await asyncio.sleep(min(quiet, start + self.max_wait - now))
+        finally:
+            del self.album_data[group_id]
+            self.done.set(group_id, True)
+
+        assembly_time = time.monotonic() - start
+        self.albums += 1
+        self.assembly_time += assembly_time
+        logger.info(f"Альбом из {len(album['parts'])} частей собран за {assembly_time:.3f} с")
+
+        data["album"] = album["parts"]
+        return await handler(event, data)
 
-        except KeyError:
-            logger.info("Добавление первого медиа")
-            self.album_data[event.media_group_id] = [event]
-            await asyncio.sleep(self.latency)
+    def stats(self) -> dict:
+        """Статистика сборки альбомов.
 
-            data["is_last"] = True
-            data["album"] = self.album_data[event.media_group_id]
+        Returns:
+            dict: Количество альбомов, отброшенных частей и среднее время сборки.
+        """
+        return {
+            "albums": self.albums,
+            "dropped": self.dropped,
+            "avg_assembly": self.assembly_time / self.albums if self.albums else 0,
+        }
 
-            return await handler(event, data)
 
-    async def after(self, handler, event: Message, data: Dict[str, Any]):
-        if event.media_group_id and data.get("is_last"):
-            logger.info("Освобождение данных")
-            del self.album_data[event.media_group_id]
+# Общий экземпляр, чтобы статистику сборки альбомов можно было вывести при остановке
+album_middleware = AlbumMiddleware()
 
 
 class LoggingMiddleware(BaseMiddleware):
@@ -67,7 +122,36 @@ class LoggingMiddleware(BaseMiddleware):
         """
         user_id = event.from_user.id
         if isinstance(event, Message):
-            logger.info(f"Message (user_id={user_id}): {event.text}")
+            logger.info(f"Message (user_id={user_id}, type={event.content_type})")
+            logger.debug(f"Message (user_id={user_id}): {event.text}")
         elif isinstance(event, CallbackQuery):
             logger.info(f"CallbackQuery (user_id={user_id}): {event.data}")
         return await handler(event, data)
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """Middleware загрузки пользователя и его профиля на update.
+
+    Args:
+        BaseMiddleware (_type_): _description_
+    """
+
+    async def __call__(self, handler: Callable, event: TelegramObject, data: Dict[str, Any]):
+        """Загрузка User и UserInfo одним запросом до обработки.
+
+        В data передаются db_user и profile.
+
+        Args:
+            handler (Callable): _description_
+            event (TelegramObject): _description_
+            data (Dict[str, Any]): _description_
+
+        Returns:
+            _type_: _description_
+        """
+        from_user = getattr(event, "from_user", None)
+        if not from_user:
+            return await handler(event, data)
+        directory.observe(from_user)
+        data["db_user"], data["profile"] = await load_user_context(from_user.id)
+        return await handler(event, data)
@@ -10,9 +10,10 @@ from app.database.requests import update_role
 from app.utils.errors import SameDataError, DBKeyError
 from app.utils.parser import get_commands
 import app.config.labels as label
-from app.database.requests import get_users, get_user
-from app.database.models import User
+from app.config import KEYBOARD_PAGE_SIZE
+from app.database.requests import get_moderators_page, get_user
 from app.roles.moderator import return_main
+from app.utils.directory import directory, markdown_name
 from app.logger import setup_logger
 
 admin = Router()
@@ -54,8 +55,8 @@ async def apply_new_moderator(message: Message, state: FSMContext):
         user_id = int(message.text)
         await update_role(user_id, Role.MODERATOR)
 
-        user = await message.bot.get_chat(user_id)
-        await message.answer(label.MODER_APPOINTED.format(user.username))
+        name = await directory.name(message.bot, user_id)
+        await message.answer(label.MODER_APPOINTED.format(markdown_name(name)))
         await message.bot.send_message(user_id, label.YOU_MODER)
         logger.info(f"Установка команд модератора user (id={user_id})")
         await message.bot.set_my_commands(
@@ -83,14 +84,14 @@ async def show_moderator_page(callback: CallbackQuery):
         callback (CallbackQuery): _description_
     """
     logger.info("Показ страницы с модераторами")
-    moders = await get_users([User.role == Role.MODERATOR.value])
-    if len(moders) > 0:
+    moders, total, page = await get_moderators_page(
+        int(callback.data.split("_")[-1]), KEYBOARD_PAGE_SIZE
+    )
+    if total > 0:
         await callback.answer()
         await callback.message.edit_text(
             label.CHOOSE_ACTION,
-            reply_markup=await get_moderators(
-                moders, int(callback.data.split("_")[-1]), callback.bot
-            ),
+            reply_markup=await get_moderators(moders, page, total, callback.bot),
         )
     else:
         await callback.answer(label.EMPTY_MODERS)
@@ -109,9 +110,9 @@ async def moderator_info(callback: CallbackQuery):
     page = int(callback.data.split("_")[2])
 
     user = await get_user(user_id)
-    user_info = await callback.bot.get_chat(user_id)
+    name = await directory.name(callback.bot, user_id)
     await callback.message.edit_text(
-        label.MODER_INFO.format(tag=f"@{user_info.username}", last_bd=user.lastDbReq),
+        label.MODER_INFO.format(tag=markdown_name(name), last_bd=user.lastDbReq),
         reply_markup=await manage_moderator(user_id, page),
     )
 
@@ -130,8 +131,8 @@ async def demote_moderator(callback: CallbackQuery, state: FSMContext):
     try:
         await update_role(user_id, Role.USER)
 
-        user = await callback.bot.get_chat(user_id)
-        await callback.message.answer(label.MODER_DEMOTE.format(user.username))
+        name = await directory.name(callback.bot, user_id)
+        await callback.message.answer(label.MODER_DEMOTE.format(markdown_name(name)))
         await callback.bot.send_message(user_id, label.YOU_USER)
         await callback.bot.set_my_commands(
             await get_commands(Role.USER),
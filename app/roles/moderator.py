@@ -1,12 +1,18 @@
-import os
-
 from aiogram import F, Router
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, FSInputFile, Message
+from aiogram.types import BufferedInputFile, CallbackQuery, Message
 
 import app.config.labels as label
-from app.database.requests import ban_user, get_role, save_appeals, save_ban_users
+from app.database.models import User
+from app.database.requests import (
+    ban_users,
+    get_roles,
+    role_of,
+    save_appeals,
+    save_appeals_csv,
+    save_ban_users,
+)
 from app.filters import RoleFilter
 from app.keyboards import (
     get_ban_reasons,
@@ -17,6 +23,11 @@ from app.keyboards import (
 from app.logger import setup_logger
 from app.roles import Role
 from app.states import BanUser, PickModerator, UnbanUser
+from app.utils.directory import directory, markdown_name
+from app.utils.notifier import MESSAGE_LIMIT
+
+# Идентификаторы пользователей хранятся в BIGINT
+BIGINT_MAX = 2**63
 
 moderator = Router()
 
@@ -28,6 +39,40 @@ for_user = Role.USER.name
 logger = setup_logger(__name__)
 
 
+def text_length(text: str) -> int:
+    """Длина текста в единицах UTF-16, которыми тг считает лимит сообщения.
+
+    Args:
+        text (str): Текст.
+
+    Returns:
+        int: Длина.
+    """
+    return len(text.encode("utf-16-le")) // 2
+
+
+def fit_names(names: list[str], room: int) -> str:
+    """Перечисление имён, не длиннее room, лишние заменяются на "и ещё N".
+
+    Args:
+        names (list[str]): Имена пользователей.
+        room (int): Доступная длина.
+
+    Returns:
+        str: Имена через запятую.
+    """
+    text = ", ".join(names)
+    if text_length(text) <= room:
+        return text
+    size = 0
+    for count, name in enumerate(names):
+        more = label.AND_MORE.format(len(names) - count)
+        if size + text_length(name) + 2 + text_length(more) > room:
+            return ", ".join(names[:count]) + more
+        size += text_length(name) + 2
+    return text
+
+
 # Общие методы
 @moderator.callback_query(F.data == "close")
 async def close(callback: CallbackQuery):
@@ -124,14 +169,15 @@ async def get_ban_reason(callback: CallbackQuery, state: FSMContext):
 
 
 @moderator.message(StateFilter(BanUser.ids, UnbanUser.ids))
-async def get_ban_ids(message: Message, state: FSMContext):
+async def get_ban_ids(message: Message, state: FSMContext, db_user: User | None):
     """Получение ids для бана.
 
     Args:
         message (Message): _description_
         state (FSMContext): _description_
+        db_user (User | None): _description_
     """
-    role = await get_role(message.from_user.id)
+    role = role_of(message.from_user.id, db_user)
     data = await state.get_data()
     last_state = await state.get_state()
     is_unbanning = last_state == UnbanUser.ids
@@ -139,33 +185,30 @@ async def get_ban_ids(message: Message, state: FSMContext):
         data["term"] = 0
     data["ban_by"] = message.from_user.id
     await state.clear()
-    valid_ids = []
-    ban_end = None
-    for user_id in message.text.split():
-        user_role = None
-        try:
-            user_id = int(user_id)
-            user_role = await get_role(user_id, False)
-            if (user_id == message.from_user.id) or (user_role.value >= role.value):
-                continue
-
-            ban_end = await ban_user(user_id, data)
-            user = await message.bot.get_chat(user_id)
-            valid_ids.append(f"@{user.username}")
-        except Exception:
-            pass
-
-    if is_unbanning:
-        await message.answer(label.SUCCESSFUL_UNBAN.format(", ".join(valid_ids)))
-    else:
-        await message.answer(
-            label.SUCCESSFUL_BAN.format(
-                ids=", ".join(valid_ids),
-                term=data.get("term"),
-                banEnd=ban_end,
-                reason=data.get("reason"),
-            )
+    user_ids = list(
+        dict.fromkeys(
+            int(user_id)
+            for user_id in message.text.split()
+            if user_id.isascii() and user_id.isdigit() and int(user_id) < BIGINT_MAX
         )
+    )
+    roles = await get_roles(user_ids)
+    allowed = [
+        user_id
+        for user_id, user_role in roles.items()
+        if user_id != message.from_user.id and user_role.value < role.value
+    ]
+    banned_ids, ban_end = await ban_users(allowed, data)
+    if not banned_ids:
+        ban_end = None
+    names = await directory.names(message.bot, banned_ids)
+    valid_ids = [markdown_name(name) for name in names.values()]
+
+    template = label.SUCCESSFUL_UNBAN if is_unbanning else label.SUCCESSFUL_BAN
+    fields = {"term": data.get("term"), "banEnd": ban_end, "reason": data.get("reason")}
+    # Сводка по сотням пользователей не должна превышать лимит сообщения
+    room = MESSAGE_LIMIT - text_length(template.format(ids="", **fields))
+    await message.answer(template.format(ids=fit_names(valid_ids, room), **fields))
     await message.bot.delete_messages(
         message.chat.id, [message.message_id - 1, message.message_id]
     )
@@ -180,23 +223,20 @@ async def download_ban_users(callback: CallbackQuery):
         state (FSMContext): _description_
     """
 
-    file_name = await save_ban_users(callback.from_user.id)
-    if not file_name:
+    export = await save_ban_users(callback.from_user.id)
+    if not export:
         await callback.answer(label.EMPTY_BANS)
         return
     await callback.answer()
-    file_path = os.path.join(os.getcwd(), file_name)
+    file_name, data = export
     try:
         await callback.message.answer_document(
-            document=FSInputFile(file_path),
+            document=BufferedInputFile(data, filename=file_name),
             caption=label.BAN_LIST,
         )
     except Exception as ex:
         logger.error(f"Невозможно загрузить список пользователей - {ex}")
         await callback.message.answer(label.DOWNLOAD_FAIL)
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
 
 
 # Разбан
@@ -225,7 +265,9 @@ async def appeals(message: Message, state: FSMContext):
         state (FSMContext): _description_
     """
     await state.clear()
-    await message.answer(label.CHOOSE_ACTION, reply_markup=await get_download_appeals())
+    await message.answer(
+        label.CHOOSE_ACTION, reply_markup=await get_download_appeals(message.from_user.id)
+    )
 
 
 @moderator.callback_query(F.data.startswith("download_"))
@@ -235,25 +277,26 @@ async def download_appeals(callback: CallbackQuery):
     Args:
         callback (CallbackQuery): _description_
     """
-    download_mode = callback.data.split("_")[-1]
+    # download_<new|all>[_csv]
+    _, download_mode, *download_format = callback.data.split("_")
     is_new = download_mode == "new"
-    file_path = ""
+    save = save_appeals_csv if download_format == ["csv"] else save_appeals
     try:
-        file_name = await save_appeals(callback.from_user.id, is_new)
-        if not file_name:
+        export = await save(callback.from_user.id, is_new)
+        if not export:
             await callback.answer(label.EMPTY_NEW_APPEALS if is_new else label.EMPTY_ALL_APPEALS)
             logger.info(f"Список обращений (is_new={is_new}) пуст")
             return
         await callback.answer()
-        file_path = os.path.join(os.getcwd(), file_name)
+        file_name, data, commit = export
         await callback.message.answer_document(
-            document=FSInputFile(file_path),
+            document=BufferedInputFile(data, filename=file_name),
             caption=label.NEW_APPEALS if is_new else label.ALL_APPEALS,
         )
+        # Курсор сдвигается только после доставки файла
+        await commit()
     except Exception as ex:
         logger.error(f"Невозможно загрузить БД - {ex}")
         await callback.message.answer(label.DOWNLOAD_FAIL)
     finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
         await close(callback)
@@ -6,12 +6,12 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import BotCommandScopeChat, CallbackQuery, Message
 
 import app.config.labels as label
+from app.database.models import User, UserInfo
 from app.database.requests import (
     add_application,
-    get_profile,
-    get_role,
     is_banned,
-    set_hash_link,
+    role_of,
+    set_hash_links,
     set_profile,
     set_user,
 )
@@ -24,6 +24,8 @@ from app.keyboards import (
 )
 from app.logger import setup_logger
 from app.states import Application, Reg, waiting_app
+from app.utils.media_cache import schedule_prefetch
+from app.utils.notifier import notifier
 from app.utils.parser import get_commands, get_files
 
 user = Router()
@@ -32,16 +34,18 @@ logger = setup_logger(__name__)
 
 
 @user.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(message: Message, state: FSMContext, db_user: User | None):
     """/start. Запуск бота.
 
     Args:
         message (Message): _description_
         state (FSMContext): _description_
+        db_user (User | None): _description_
     """
     await state.clear()
     user_id = message.from_user.id
-    await set_user(user_id)
+    if not db_user:
+        await set_user(user_id)
     msg = await message.answer(label.HELLO, reply_markup=applicationKb)
     try:
         await message.bot.unpin_chat_message(message.chat.id)
@@ -51,7 +55,7 @@ async def cmd_start(message: Message, state: FSMContext):
         chat_id=message.chat.id, message_id=msg.message_id
     )
 
-    user_role = await get_role(user_id)
+    user_role = role_of(user_id, db_user)
     await message.bot.set_my_commands(
         await get_commands(user_role),
         scope=BotCommandScopeChat(chat_id=message.chat.id),
@@ -72,16 +76,17 @@ async def show_id(message: Message, state: FSMContext):
 
 # Работа с обращением
 @user.callback_query(F.data == "application")
-async def application(callback: CallbackQuery, state: FSMContext):
+async def application(callback: CallbackQuery, state: FSMContext, profile: UserInfo | None):
     """Начало для отправки обращения.
 
     Args:
         callback (CallbackQuery): _description_
         state (FSMContext): _description_
+        profile (UserInfo | None): _description_
     """
     await state.clear()
     await callback.answer()
-    if not await get_profile(callback.from_user.id):
+    if not profile:
         await state.set_data({waiting_app: True})
         await change_profile(callback, state)
     else:
@@ -145,25 +150,30 @@ async def get_appeal_address(message: Message, state: FSMContext):
 
 
 @user.message(Application.body)
-async def get_appeal_body(message: Message, state: FSMContext, album: list = None):
+async def get_appeal_body(
+    message: Message, state: FSMContext, db_user: User | None, album: list = None
+):
     """Окончание заполнения обращения.
 
     Args:
         message (Message): _description_
         state (FSMContext): _description_
+        db_user (User | None): _description_
         album (list, optional): _description_. Defaults to None.
     """
-    await state.update_data(body=message.md_text)
+    # В БД - текст с разметкой, в карточку модераторам (без разметки) - исходный
+    await state.update_data(body=message.md_text, plain_body=message.text or message.caption or "")
 
-    if not await is_banned(message.from_user.id):
+    if not await is_banned(message.from_user.id, db_user):
         attachments = await get_files(album if album else [message])
         if attachments:
+            hashes = dict(zip(await set_hash_links(attachments), attachments))
             links = [
-                f'https://{os.getenv("SERVER_HOST")}:{os.getenv("SERVER_PORT")}\
-/{await set_hash_link(link)}'
-                for link in attachments
+                f'https://{os.getenv("SERVER_HOST")}:{os.getenv("SERVER_PORT")}/{hash}'
+                for hash in hashes
             ]
             await state.update_data({"attachments": "\n".join(links)})
+            schedule_prefetch(hashes)
 
     await state.set_state(Application.police)
     await message.answer(label.CONTACT_POLICE, reply_markup=policeKb)
@@ -171,27 +181,36 @@ async def get_appeal_body(message: Message, state: FSMContext, album: list = Non
 
 
 @user.callback_query(F.data == "dont_contact_police", Application.police)
-async def dont_contact_police(callback: CallbackQuery, state: FSMContext):
+async def dont_contact_police(callback: CallbackQuery, state: FSMContext, db_user: User | None):
     callback.answer()
     await state.update_data(police=label.DONT_CONTACT_POLICE)
     await complete_application(
-        callback.from_user.id, callback.message, state, [callback.message.message_id]
+        callback.from_user.id,
+        callback.message,
+        state,
+        [callback.message.message_id],
+        db_user,
     )
 
 
 @user.message(Application.police)
-async def contact_police(message: Message, state: FSMContext):
+async def contact_police(message: Message, state: FSMContext, db_user: User | None):
     await state.update_data(police=message.text)
     await complete_application(
         message.from_user.id,
         message,
         state,
         [message.message_id - 1, message.message_id],
+        db_user,
     )
 
 
 async def complete_application(
-    user_id, message: Message, state: FSMContext, msgs_delete
+    user_id,
+    message: Message,
+    state: FSMContext,
+    msgs_delete,
+    db_user: User | None,
 ):
     data = await state.get_data()
     await state.clear()
@@ -207,11 +226,12 @@ async def complete_application(
         ),
     )
 
-    if await is_banned(user_id):
+    if await is_banned(user_id, db_user):
         return
 
     if data.get("body") or data.get("attachments"):
-        await add_application(user_id, message.message_id, data)
+        written = await add_application(user_id, message.message_id, data, wait=False)
+        notifier.publish(written, user_id, data)
 
 
 @user.callback_query(F.data == "app_stepback")
@@ -236,15 +256,16 @@ async def step_back(callback: CallbackQuery, state: FSMContext):
 
 # Работа с профилем
 @user.message(Command("profile"))
-async def show_profile(message: Message, state: FSMContext):
+async def show_profile(message: Message, state: FSMContext, profile: UserInfo | None):
     """Показ профиля пользователя.
 
     Args:
         message (Message): _description_
         state (FSMContext): _description_
+        profile (UserInfo | None): _description_
     """
     await state.clear()
-    profile_obj = await get_profile(message.from_user.id)
+    profile_obj = profile
     if profile_obj:
         await message.answer(
             label.YOUR_PROFILE.format(
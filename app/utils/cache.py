@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# Маркер отсутствия записи в кеше (None может быть закешированным значением)
+MISSING = object()
+
+
+class TTLCache:
+    """LRU кеш с ограниченным размером и временем жизни записей."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        """Инициализация кеша.
+
+        Args:
+            maxsize (int, optional): Максимальное количество записей. Defaults to 1024.
+            ttl (float, optional): Время жизни записи в секундах. Defaults to 60.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Получение значения по ключу.
+
+        Args:
+            key (Hashable): Ключ.
+            default (Any, optional): Значение при промахе. Defaults to MISSING.
+
+        Returns:
+            Any: Закешированное значение или default.
+        """
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """Запись значения в кеш с вытеснением самых старых записей.
+
+        Args:
+            key (Hashable): Ключ.
+            value (Any): Значение.
+            ttl (float | None, optional): Собственное время жизни записи. Defaults to None.
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, *keys: Hashable):
+        """Инвалидация записей.
+
+        Args:
+            keys (Hashable): Ключи.
+        """
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Полная очистка кеша."""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Статистика кеша.
+
+        Returns:
+            dict: Размер, попадания и промахи.
+        """
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,150 @@
+import asyncio
+import re
+from os import getenv
+
+from aiogram import Bot
+from aiogram.types import User as TgUser
+
+from app.database.requests import get_chat_names, set_chat_name
+from app.logger import setup_logger
+from app.utils.cache import MISSING, TTLCache
+
+logger = setup_logger(__name__)
+
+# Символы разметки legacy Markdown, экранируемые вне сущностей
+MARKDOWN_SPECIAL = re.compile(r"([_*`\[])")
+
+
+def display_name(user_id: int, username: str | None, full_name: str | None) -> str:
+    """Отображаемое имя пользователя тг.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        username (str | None): Username тг.
+        full_name (str | None): Имя в тг.
+
+    Returns:
+        str: @username, иначе имя, иначе идентификатор.
+    """
+    if username:
+        return f"@{username}"
+    return full_name or str(user_id)
+
+
+def markdown_name(name: str) -> str:
+    """Имя пользователя для вставки в сообщение с разметкой Markdown.
+
+    Экранирование работает только вне сущностей, поэтому имя нельзя
+    помещать внутрь _..._ или *...*.
+
+    Args:
+        name (str): Отображаемое имя.
+
+    Returns:
+        str: Экранированное имя.
+    """
+    return MARKDOWN_SPECIAL.sub(r"\\\1", name)
+
+
+class UserDirectory:
+    """Справочник имён пользователей тг.
+
+    Имена обновляются из from_user входящих обновлений через очередь записи,
+    getChat вызывается только для неизвестных пользователей.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600, concurrency: int = 5):
+        """Инициализация справочника.
+
+        Args:
+            maxsize (int, optional): Максимальное количество записей. Defaults to 10000.
+            ttl (float, optional): Время жизни записи. Defaults to 3600.
+            concurrency (int, optional): Одновременные запросы getChat. Defaults to 5.
+        """
+        self.fetched = 0
+        self._names = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def observe(self, user: TgUser):
+        """Обновление имени по from_user, запись только при изменении.
+
+        Args:
+            user (TgUser): Отправитель обновления.
+        """
+        name = (user.username, user.full_name)
+        if self._names.get(user.id) == name:
+            return
+        self._names.set(user.id, name)
+        asyncio.ensure_future(set_chat_name(user.id, *name))
+
+    async def names(self, bot: Bot, user_ids) -> dict[int, str]:
+        """Отображаемые имена пользователей.
+
+        Args:
+            bot (Bot): Бот.
+            user_ids (Iterable[int]): Идентификаторы пользователей.
+
+        Returns:
+            dict[int, str]: Соответствие идентификатор - имя.
+        """
+        names = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            name = self._names.get(user_id)
+            if name is MISSING:
+                missing.append(user_id)
+            else:
+                names[user_id] = name
+
+        if missing:
+            for user_id, row in (await get_chat_names(missing)).items():
+                names[user_id] = (row.username, row.fullName)
+                self._names.set(user_id, names[user_id])
+            fetched = await asyncio.gather(
+                *(self._fetch(bot, user_id) for user_id in missing if user_id not in names)
+            )
+            names.update(item for item in fetched if item)
+
+        return {user_id: display_name(user_id, *name) for user_id, name in names.items()} | {
+            user_id: str(user_id) for user_id in user_ids if user_id not in names
+        }
+
+    async def name(self, bot: Bot, user_id: int) -> str:
+        """Отображаемое имя одного пользователя.
+
+        Args:
+            bot (Bot): Бот.
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            str: Имя пользователя.
+        """
+        return (await self.names(bot, [user_id]))[user_id]
+
+    async def _fetch(self, bot: Bot, user_id: int):
+        async with self._semaphore:
+            try:
+                chat = await bot.get_chat(user_id)
+            except Exception as ex:
+                logger.info(f"Не удалось получить чат {user_id} - {ex}")
+                return None
+        self.fetched += 1
+        name = (chat.username, chat.full_name)
+        self._names.set(user_id, name)
+        await set_chat_name(user_id, *name)
+        return user_id, name
+
+    def stats(self) -> dict:
+        """Статистика справочника.
+
+        Returns:
+            dict: Попадания, промахи и запросы getChat.
+        """
+        return {**self._names.stats(), "fetched": self.fetched}
+
+
+directory = UserDirectory(
+    maxsize=int(getenv("DIRECTORY_CACHE_SIZE") or 10000),
+    ttl=int(getenv("DIRECTORY_CACHE_TTL") or 3600),
+    concurrency=int(getenv("DIRECTORY_FETCH_LIMIT") or 5),
+)
@@ -0,0 +1,240 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from datetime import datetime
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Количество строк, забираемых из курсора БД за один раз
+EXPORT_BATCH = 1000
+
+# Выгрузка держится в памяти до этого размера, затем переносится на диск
+SPOOL_MAX_SIZE = int(os.getenv("EXPORT_SPOOL_SIZE") or 16) * 1024 * 1024
+# Каталог временных файлов выгрузок, по умолчанию системный. /dev/shm в docker
+# по умолчанию 64 МБ и не вмещает полную выгрузку
+SPOOL_DIR = os.getenv("EXPORT_TMP_DIR") or None
+
+# Размер несжатой части выгрузки, сжимаемой за один раз
+GZIP_CHUNK = 1024 * 1024
+
+# Процессы генерации выгрузок и максимум одновременных выгрузок
+EXPORT_PROCESSES = int(os.getenv("EXPORT_PROCESSES") or 2)
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY") or 2)
+
+_pool: ProcessPoolExecutor | None = None
+_slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+
+
+def spool():
+    """Временный файл выгрузки без общего пути на диске.
+
+    Returns:
+        SpooledTemporaryFile: Файл в памяти, переносимый в SPOOL_DIR при росте.
+    """
+    return SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, dir=SPOOL_DIR)
+
+
+def batch_file():
+    """Временный файл пачек строк, передаваемый в пул процессов по пути.
+
+    Returns:
+        NamedTemporaryFile: Файл в SPOOL_DIR, удаляемый при закрытии.
+    """
+    return NamedTemporaryFile(dir=SPOOL_DIR, suffix=".batches")
+
+
+def write_batch(file, batch: list[tuple]):
+    """Дозапись пачки строк в файл пачек.
+
+    Args:
+        file (BinaryIO): Файл пачек.
+        batch (list[tuple]): Строки.
+    """
+    pickle.dump(batch, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_batches(path: str):
+    """Чтение пачек строк из файла пачек по одной.
+
+    Args:
+        path (str): Путь к файлу пачек.
+
+    Yields:
+        list[tuple]: Пачка строк.
+    """
+    with open(path, "rb") as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+def spooled_bytes(file) -> bytes:
+    """Содержимое временного файла выгрузки.
+
+    Args:
+        file (SpooledTemporaryFile): Файл выгрузки.
+
+    Returns:
+        bytes: Содержимое файла.
+    """
+    file.seek(0)
+    return file.read()
+
+
+class XlsxExport:
+    """Потоковая запись excel таблицы в режиме write-only openpyxl.
+
+    Строки сразу сериализуются, поэтому память не зависит от их количества.
+    """
+
+    def __init__(self, header: list[str]):
+        """Создание книги с заголовком.
+
+        Args:
+            header (list[str]): Названия столбцов.
+        """
+        self.rows = 0
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet()
+        self._ws.append([self._header_cell(name) for name in header])
+
+    def _header_cell(self, name: str):
+        cell = WriteOnlyCell(self._ws, value=name)
+        cell.font = Font(bold=True)
+        return cell
+
+    def append(self, row):
+        """Добавление строки.
+
+        Args:
+            row (Iterable): Значения ячеек.
+        """
+        self._ws.append([v.replace(tzinfo=None) if isinstance(v, datetime) else v for v in row])
+        self.rows += 1
+
+    def save(self, file):
+        """Сохранение книги.
+
+        Args:
+            file (str | BinaryIO): Путь или файловый объект.
+        """
+        self._wb.save(file)
+
+
+def build_xlsx(header: list[str], path: str) -> bytes:
+    """Сборка excel таблицы (выполняется в процессе пула).
+
+    Args:
+        header (list[str]): Названия столбцов.
+        path (str): Путь к файлу пачек строк.
+
+    Returns:
+        bytes: Содержимое файла xlsx.
+    """
+    export = XlsxExport(header)
+    for batch in read_batches(path):
+        for row in batch:
+            export.append(row)
+    with spool() as file:
+        export.save(file)
+        return spooled_bytes(file)
+
+
+class GzipSpool:
+    """Потоковое сжатие выгрузки gzip во временный файл.
+
+    Данные копятся до GZIP_CHUNK и сжимаются в потоке, zlib отпускает GIL,
+    поэтому event loop не блокируется и весь файл не держится несжатым.
+    """
+
+    def __init__(self, file):
+        """Инициализация сжатия.
+
+        Args:
+            file (BinaryIO): Файл для сжатых данных.
+        """
+        self._file = file
+        self._buffer = bytearray()
+        self._zip = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    async def write(self, chunk: bytes):
+        """Дозапись данных.
+
+        Args:
+            chunk (bytes): Очередная часть выгрузки.
+        """
+        self._buffer += chunk
+        if len(self._buffer) >= GZIP_CHUNK:
+            data, self._buffer = bytes(self._buffer), bytearray()
+            self._file.write(await asyncio.to_thread(self._zip.compress, data))
+
+    async def close(self):
+        """Сжатие остатка и завершение потока gzip."""
+        data, self._buffer = bytes(self._buffer), bytearray()
+        self._file.write(await asyncio.to_thread(self._compress_last, data))
+
+    def _compress_last(self, data: bytes) -> bytes:
+        return self._zip.compress(data) + self._zip.flush()
+
+
+@asynccontextmanager
+async def export_slot():
+    """Слот выгрузки на всё время от чтения строк до генерации файла.
+
+    Одновременно выполняется не больше EXPORT_CONCURRENCY выгрузок,
+    остальные ждут своей очереди, не занимая соединения БД и память.
+    """
+    async with _slots:
+        yield
+
+
+async def run_export(func, *args):
+    """Выполнение генерации выгрузки в пуле процессов.
+
+    Вызывается внутри export_slot(). Пул, потерявший процесс (например, по
+    OOM), пересоздаётся при следующей выгрузке.
+
+    Args:
+        func (Callable): Функция уровня модуля.
+        *args: Аргументы функции (передаются через pickle).
+
+    Returns:
+        Any: Результат функции.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            EXPORT_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+        )
+    pool = _pool
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        # Сломанный пул отклоняет все задачи, параллельная выгрузка могла уже заменить его
+        if _pool is pool:
+            logger.error("Пул процессов выгрузок сломан, будет создан заново")
+            _pool = None
+        pool.shutdown(wait=False)
+        raise
+
+
+def shutdown_exports():
+    """Остановка пула процессов выгрузок."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
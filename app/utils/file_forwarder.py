@@ -1,34 +1,124 @@
-import asyncio
 import os
+import re
+from contextlib import asynccontextmanager, nullcontext
 
-import requests
+import aiofiles
+import aiohttp
 import uvicorn
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
 
 from app.database.requests import get_hash_link
-from app.instances import bot, loop
+from app.instances import bot
 from app.logger import setup_logger
 from app.utils.errors import FileForwarder
-
-forwarder = FastAPI()
+from app.utils.file_info import file_info_cache
+from app.utils.media_cache import media_cache
 
 TELEGRAM_API = f"https://api.telegram.org/file/bot{os.getenv('TOKEN_BOT')}/"
 
+# Размер чанка при передаче файла клиенту
+CHUNK_SIZE = 64 * 1024
+
+# Хеши приложений - md5 в hex
+HASH_RE = re.compile(r"[0-9a-f]{32}")
+
+# Заголовки ответа с файлом
+NO_CACHE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
 logger = setup_logger(__name__)
 
+# Общий пул соединений к файловому API Telegram
+http: aiohttp.ClientSession | None = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Открытие кеша приложений, создание и закрытие HTTP клиента вместе с сервером."""
+    global http
+    media_cache.open()
+    http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60),
+    )
+    try:
+        yield
+    finally:
+        await http.close()
+
+
+forwarder = FastAPI(lifespan=lifespan)
+
+
+class ForwarderServer(uvicorn.Server):
+    """uvicorn сервер в event loop бота.
 
-def run_forwarder():
-    """Запуск сервера для переадресации обращений к приложений из тг."""
-    logger.info("Запуск FastAPI сервера в новом потоке")
-    uvicorn.run(
-        forwarder,
-        host="0.0.0.0",
-        port=int(os.getenv("SERVER_PORT")),
-        ssl_keyfile="../data/key.pem",
-        ssl_certfile="../data/cert.pem",
+    Сигналы не перехватываются - остановкой управляет основной процесс.
+    Ошибка запуска сервера не останавливает бота.
+    """
+
+    def capture_signals(self):
+        return nullcontext()
+
+    async def serve(self, sockets=None):
+        try:
+            await super().serve(sockets)
+        except (Exception, SystemExit) as ex:
+            # uvicorn вызывает sys.exit(1), если не удалось занять порт
+            logger.error(f"Сервер переадресации остановлен - {ex!r}")
+
+
+def create_forwarder():
+    """Создание сервера для переадресации обращений к приложениям из тг.
+
+    Returns:
+        ForwarderServer: Сервер, запускаемый через serve() в event loop бота.
+    """
+    return ForwarderServer(
+        uvicorn.Config(
+            forwarder,
+            host="0.0.0.0",
+            port=int(os.getenv("SERVER_PORT")),
+            ssl_keyfile="../data/key.pem",
+            ssl_certfile="../data/cert.pem",
+            log_config=None,
+        )
     )
 
 
+async def iter_response(response: aiohttp.ClientResponse, hash: str, filename: str):
+    """Передача тела ответа Telegram по чанкам с параллельной записью в кеш.
+
+    Файл попадает в кеш только если был передан полностью.
+
+    Args:
+        response (aiohttp.ClientResponse): Ответ файлового API.
+        hash (str): Хеш приложения.
+        filename (str): Имя файла в тг.
+
+    Yields:
+        bytes: Чанк файла.
+    """
+    temp_path = media_cache.temp_path(hash)
+    complete = False
+    try:
+        async with aiofiles.open(temp_path, "wb") as file:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                await file.write(chunk)
+                yield chunk
+        complete = True
+    finally:
+        response.release()
+        if complete:
+            media_cache.commit(hash, temp_path, filename)
+        else:
+            media_cache.discard(temp_path)
+
+
 @forwarder.get("/favicon.ico", include_in_schema=False)
 async def favicon():
     return None
@@ -38,12 +128,22 @@ async def favicon():
 async def get_media(hash):
     logger.info(f"Получено новое обращение за файлом (hash={hash})")
     try:
-        future = asyncio.run_coroutine_threadsafe(get_hash_link(hash), loop)
-        file_id: str = future.result()
+        if not HASH_RE.fullmatch(hash):
+            raise FileForwarder("Неверный хеш")
+        cached = media_cache.get(hash)
+        if cached:
+            path, filename = cached
+            return FileResponse(
+                path,
+                headers=NO_CACHE_HEADERS,
+                filename=filename,
+                content_disposition_type="inline",
+            )
+
+        file_id: str = await get_hash_link(hash)
         if not file_id:
             raise FileForwarder("Неверный хеш")
-        future = asyncio.run_coroutine_threadsafe(bot.get_file(file_id), loop)
-        file_obj = future.result()
+        file_obj = await file_info_cache.get(bot, file_id)
         if (not file_obj) or (not file_obj.file_path):
             raise FileForwarder("Не удалось получить путь к файлу")
         link = file_obj.file_path
@@ -51,19 +151,21 @@ async def get_media(hash):
         media_type, filename = link.split("/")
         file_url = f"{TELEGRAM_API}{media_type}/{filename}"
 
-        response = requests.get(file_url, stream=True)
+        response = await http.get(file_url)
 
-        if response.status_code != 200:
+        if response.status != 200:
+            response.release()
             raise FileForwarder("Не найден файл")
 
-        headers = {
-            "Content-Disposition": f'inline; filename="{filename}"',
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0",
-        }
+        headers = {"Content-Disposition": f'inline; filename="{filename}"', **NO_CACHE_HEADERS}
+        if response.content_length is not None:
+            headers["Content-Length"] = str(response.content_length)
 
-        return Response(content=response.content, headers=headers)
+        return StreamingResponse(
+            iter_response(response, hash, filename),
+            headers=headers,
+            media_type=response.content_type,
+        )
     except FileForwarder as ex:
         logger.info(ex)
         raise HTTPException(status_code=404, detail="File not found")
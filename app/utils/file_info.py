@@ -0,0 +1,77 @@
+import asyncio
+
+from aiogram import Bot
+from aiogram.types import File
+
+from app.logger import setup_logger
+from app.utils.cache import MISSING, TTLCache
+
+logger = setup_logger(__name__)
+
+# Telegram гарантирует валидность file_path не менее часа, берём с запасом
+FILE_PATH_TTL = 55 * 60
+
+
+class FileInfoCache:
+    """Кеш getFile с объединением одновременных запросов одного file_id."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = FILE_PATH_TTL):
+        """Инициализация кеша.
+
+        Args:
+            maxsize (int, optional): Максимальное количество записей. Defaults to 4096.
+            ttl (float, optional): Время жизни записи. Defaults to FILE_PATH_TTL.
+        """
+        self.issued = 0
+        self.coalesced = 0
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def get(self, bot: Bot, file_id: str) -> File:
+        """Получение file_path и file_size файла тг.
+
+        Args:
+            bot (Bot): Бот.
+            file_id (str): Идентификатор файла.
+
+        Returns:
+            File: Объект файла тг.
+        """
+        file_obj = self._cache.get(file_id)
+        if file_obj is not MISSING:
+            return file_obj
+
+        future = self._in_flight.get(file_id)
+        if future:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[file_id] = future
+        self.issued += 1
+        try:
+            file_obj = await bot.get_file(file_id)
+            self._cache.set(file_id, file_obj)
+            future.set_result(file_obj)
+            return file_obj
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as ex:
+            future.set_exception(ex)
+            # Исключение уже передано ожидающим, сам future больше не нужен
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[file_id]
+
+    def stats(self) -> dict:
+        """Статистика кеша.
+
+        Returns:
+            dict: Попадания, промахи, выполненные и объединённые запросы.
+        """
+        return {**self._cache.stats(), "issued": self.issued, "coalesced": self.coalesced}
+
+
+file_info_cache = FileInfoCache()
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+import aiohttp
+
+from app.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+TMP_SUFFIX = ".tmp"
+
+# Временные файлы старше этого возраста считаются брошенными
+TMP_MAX_AGE = 3600
+
+
+class MediaCache:
+    """Дисковый кеш приложений по хешу с LRU вытеснением.
+
+    Файлы сначала пишутся во временный файл и атомарно переименовываются,
+    поэтому в кеше никогда не бывает недописанных файлов. Владелец кеша -
+    процесс сервера переадресации, остальные процессы загружают файлы
+    через него (см. prefetch).
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """Инициализация кеша, индекс восстанавливается в open().
+
+        Args:
+            directory (str): Папка кеша.
+            max_bytes (int): Максимальный суммарный размер файлов.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._files: OrderedDict[str, tuple[str, int]] = OrderedDict()
+
+    def open(self):
+        """Восстановление индекса с диска процессом-владельцем."""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            stat = entry.stat()
+            if entry.name.endswith(TMP_SUFFIX):
+                # Свежий временный файл может дописываться другим экземпляром бота
+                if time.time() - stat.st_mtime > TMP_MAX_AGE:
+                    self.discard(entry.path)
+                continue
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name.split(".")[0]] = (name, size)
+            self.size += size
+        self._evict()
+        logger.info(f"Кеш приложений: {len(self._files)} файлов, {self.size} байт")
+
+    def get(self, hash: str):
+        """Получение закешированного файла.
+
+        Args:
+            hash (str): Хеш приложения.
+
+        Returns:
+            tuple[str, str] | None: Путь и имя файла.
+        """
+        item = self._files.get(hash)
+        if not item:
+            return None
+        self._files.move_to_end(hash)
+        return os.path.join(self.directory, item[0]), item[0]
+
+    def temp_path(self, hash: str):
+        """Уникальный временный путь для записи файла.
+
+        Args:
+            hash (str): Хеш приложения.
+
+        Returns:
+            str: Путь временного файла.
+        """
+        return os.path.join(self.directory, f"{hash}.{uuid.uuid4().hex}{TMP_SUFFIX}")
+
+    def commit(self, hash: str, temp_path: str, filename: str):
+        """Атомарное добавление дописанного файла в кеш.
+
+        Args:
+            hash (str): Хеш приложения.
+            temp_path (str): Временный файл.
+            filename (str): Исходное имя файла в тг (для расширения).
+        """
+        size = os.path.getsize(temp_path)
+        if size > self.max_bytes:
+            self.discard(temp_path)
+            return
+        name = hash + os.path.splitext(filename)[1]
+        os.replace(temp_path, os.path.join(self.directory, name))
+        old = self._files.pop(hash, None)
+        if old:
+            self.size -= old[1]
+            if old[0] != name:
+                self._remove(old[0])
+        self._files[hash] = (name, size)
+        self.size += size
+        self._evict()
+
+    def discard(self, temp_path: str):
+        """Удаление недописанного временного файла.
+
+        Args:
+            temp_path (str): Временный файл.
+        """
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._files:
+            _, (name, size) = self._files.popitem(last=False)
+            self.size -= size
+            self._remove(name)
+
+    def _remove(self, name: str):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+
+media_cache = MediaCache(
+    directory=os.getenv("MEDIA_CACHE_DIR") or "../data/media",
+    max_bytes=int(os.getenv("MEDIA_CACHE_SIZE") or 1024) * 1024 * 1024,
+)
+
+# Фоновая загрузка приложений в кеш сразу после отправки обращения
+PREFETCH = os.getenv("MEDIA_PREFETCH", "").lower() in ("1", "true", "yes")
+
+_prefetch_tasks: set[asyncio.Task] = set()
+
+
+async def prefetch(hashes: list[str]):
+    """Загрузка приложений в кеш запросами к серверу переадресации.
+
+    Файлы пишет только процесс сервера, поэтому индекс и лимит размера
+    кеша общие для всех процессов-обработчиков.
+
+    Args:
+        hashes (list[str]): Хеши приложений.
+    """
+    url = f"https://127.0.0.1:{os.getenv('SERVER_PORT')}/"
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=300)) as session:
+        for hash in hashes:
+            try:
+                async with session.get(url + hash, ssl=False) as response:
+                    response.raise_for_status()
+                    async for _ in response.content.iter_any():
+                        pass
+                logger.info(f"Приложение (hash={hash}) загружено в кеш")
+            except Exception as ex:
+                logger.error(f"Не удалось загрузить приложение (hash={hash}) в кеш - {ex}")
+
+
+def schedule_prefetch(hashes):
+    """Запуск фоновой загрузки приложений, если она включена.
+
+    Args:
+        hashes (Iterable[str]): Хеши приложений.
+    """
+    if not PREFETCH:
+        return
+    task = asyncio.create_task(prefetch(list(hashes)))
+    _prefetch_tasks.add(task)
+    task.add_done_callback(_prefetch_tasks.discard)
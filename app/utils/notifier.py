@@ -0,0 +1,149 @@
+import asyncio
+from os import getenv
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError
+
+import app.config.labels as label
+from app.database.requests import get_moderator_ids
+from app.logger import setup_logger
+from app.utils.cache import MISSING, TTLCache
+
+logger = setup_logger(__name__)
+
+# Максимальная длина текста сообщения в тг
+MESSAGE_LIMIT = 4096
+
+
+class AppealNotifier:
+    """Рассылка карточек новых обращений модераторам.
+
+    Обращение публикуется без ожидания и рассылается после commit в БД.
+    Отправка идёт пулом задач через общий планировщик запросов бота,
+    неудачные отправки повторяются с нарастающей паузой.
+    """
+
+    def __init__(self, workers: int = 4, retries: int = 3, maxsize: int = 10000):
+        """Инициализация рассылки.
+
+        Args:
+            workers (int, optional): Количество задач отправки. Defaults to 4.
+            retries (int, optional): Повторы неудачной отправки. Defaults to 3.
+            maxsize (int, optional): Максимальный размер очереди. Defaults to 10000.
+        """
+        self.workers = workers
+        self.retries = retries
+        self.sent = 0
+        self.failed = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._tasks: list[asyncio.Task] = []
+        self._pending: set[asyncio.Task] = set()
+        self._moderators = TTLCache(maxsize=1, ttl=60)
+
+    def start(self, bot: Bot):
+        """Запуск задач отправки.
+
+        Args:
+            bot (Bot): Бот.
+        """
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run(bot)) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10):
+        """Досылка очереди и остановка.
+
+        Args:
+            timeout (float, optional): Максимальное ожидание досылки. Defaults to 10.
+        """
+        if not self._tasks:
+            return
+        try:
+            if self._pending:
+                await asyncio.wait(self._pending, timeout=timeout)
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.error(f"Не разослано {self._queue.qsize()} карточек обращений")
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        logger.info(f"Рассылка обращений остановлена: {self.stats()}")
+
+    def publish(self, written: asyncio.Future, user_id, data: dict):
+        """Публикация обращения, рассылка начнётся после его записи в БД.
+
+        Args:
+            written (asyncio.Future): Завершение записи обращения.
+            user_id (int): Идентификатор автора.
+            data (dict): Данные обращения.
+        """
+        if not self._tasks:
+            return
+        text = label.APPEAL_CARD.format(
+            user_id=user_id,
+            category=data.get("category"),
+            address=data.get("address"),
+            body=data.get("plain_body", ""),
+            police=data.get("police"),
+            attachments=data.get("attachments", ""),
+        )[:MESSAGE_LIMIT]
+        task = asyncio.create_task(self._fan_out(written, text))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _fan_out(self, written: asyncio.Future, text: str):
+        try:
+            await written
+        except Exception:
+            # Обращение не записано - рассылать нечего
+            return
+        try:
+            moderators = self._moderators.get("ids")
+            if moderators is MISSING:
+                moderators = await get_moderator_ids()
+                self._moderators.set("ids", moderators)
+        except Exception as ex:
+            logger.error(f"Не удалось получить список модераторов - {ex}")
+            return
+        for chat_id in moderators:
+            try:
+                self._queue.put_nowait((chat_id, text))
+            except asyncio.QueueFull:
+                self.failed += 1
+                logger.error(f"Очередь рассылки переполнена, карточка для {chat_id} пропущена")
+
+    async def _run(self, bot: Bot):
+        while True:
+            chat_id, text = await self._queue.get()
+            try:
+                await self._send(bot, chat_id, text)
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, bot: Bot, chat_id, text: str):
+        for attempt in range(self.retries + 1):
+            try:
+                await bot.send_message(chat_id, text, parse_mode=None)
+                self.sent += 1
+                return
+            except TelegramForbiddenError:
+                # Модератор заблокировал бота
+                break
+            except Exception as ex:
+                logger.info(f"Не удалось отправить карточку обращения {chat_id} - {ex}")
+                if attempt < self.retries:
+                    await asyncio.sleep(2**attempt)
+        self.failed += 1
+
+    def stats(self) -> dict:
+        """Статистика рассылки.
+
+        Returns:
+            dict: Отправленные и неотправленные карточки.
+        """
+        return {"sent": self.sent, "failed": self.failed}
+
+
+notifier = AppealNotifier(
+    workers=int(getenv("NOTIFY_WORKERS") or 4),
+    retries=int(getenv("NOTIFY_RETRIES") or 3),
+)
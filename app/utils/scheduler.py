@@ -0,0 +1,230 @@
+import asyncio
+import heapq
+import itertools
+import time
+from os import getenv
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    AnswerCallbackQuery,
+    DeleteMessage,
+    DeleteMessages,
+    GetUpdates,
+    PinChatMessage,
+    SetMyCommands,
+    TelegramMethod,
+)
+
+from app.logger import setup_logger
+from app.utils.cache import MISSING, TTLCache
+
+logger = setup_logger(__name__)
+
+# Приоритеты запросов: меньше - раньше
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITIES = {
+    AnswerCallbackQuery: PRIORITY_HIGH,
+    DeleteMessage: PRIORITY_LOW,
+    DeleteMessages: PRIORITY_LOW,
+    PinChatMessage: PRIORITY_LOW,
+    SetMyCommands: PRIORITY_LOW,
+}
+
+# Максимум сообщений в одном deleteMessages
+DELETE_LIMIT = 100
+
+# Лимит тг на чат касается отправки сообщений: send*, copy*, forward*
+CHAT_LIMITED_PREFIXES = ("Send", "Copy", "Forward")
+
+
+class TokenBucket:
+    """Token bucket с очередью ожидающих по приоритету."""
+
+    def __init__(self, rate: float, capacity: float):
+        """Инициализация bucket.
+
+        Args:
+            rate (float): Токенов в секунду.
+            capacity (float): Максимальный запас токенов.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._waiters: list = []
+        self._seq = itertools.count()
+        self._pump: asyncio.Task | None = None
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL):
+        """Ожидание токена.
+
+        Args:
+            priority (int, optional): Приоритет запроса. Defaults to PRIORITY_NORMAL.
+        """
+        self._refill(time.monotonic())
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._release())
+        await future
+
+    def penalize(self, seconds: float):
+        """Запрет выдачи токенов на seconds секунд (после RetryAfter).
+
+        Args:
+            seconds (float): Время ожидания.
+        """
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+    async def _release(self):
+        while self._waiters:
+            self._refill(time.monotonic())
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._tokens -= 1
+                future.set_result(None)
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Middleware исходящих запросов бота.
+
+    Ограничивает общую частоту запросов и частоту отправки сообщений в чат
+    (редактирование, удаление и закрепление - только общим лимитом),
+    повторяет запросы после TelegramRetryAfter и объединяет удаления
+    сообщений одного чата в один deleteMessages.
+    """
+
+    def __init__(
+        self,
+        rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        retries: int = 3,
+        coalesce_delay: float = 0.05,
+    ):
+        """Инициализация планировщика.
+
+        Args:
+            rate (float, optional): Общий лимит запросов в секунду. Defaults to 30.
+            chat_rate (float, optional): Лимит запросов в чат в секунду. Defaults to 1.
+            chat_burst (float, optional): Запас запросов в чат. Defaults to 3.
+            retries (int, optional): Повторы после RetryAfter. Defaults to 3.
+            coalesce_delay (float, optional): Окно объединения удалений. Defaults to 0.05.
+        """
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.retries = retries
+        self.coalesce_delay = coalesce_delay
+        self.retried = 0
+        self.coalesced = 0
+        self._global: TokenBucket | None = None
+        self._chats = TTLCache(maxsize=10000, ttl=60)
+        self._deletes: dict = {}
+
+    async def __call__(self, make_request, bot: Bot, method: TelegramMethod):
+        if isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+        if isinstance(method, (DeleteMessage, DeleteMessages)):
+            return await self._delete(make_request, bot, method)
+        return await self._send(make_request, bot, method)
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is MISSING:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+        # Продление жизни bucket при каждом обращении
+        self._chats.set(chat_id, bucket)
+        return bucket
+
+    async def _send(self, make_request, bot: Bot, method: TelegramMethod):
+        if self._global is None:
+            self._global = TokenBucket(self.rate, self.rate)
+        priority = PRIORITIES.get(type(method), PRIORITY_NORMAL)
+        chat_id = getattr(method, "chat_id", None)
+        chat = None
+        if chat_id is not None and type(method).__name__.startswith(CHAT_LIMITED_PREFIXES):
+            chat = self._chat_bucket(chat_id)
+        attempt = 0
+        while True:
+            if chat:
+                await chat.acquire(priority)
+            await self._global.acquire(priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as ex:
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                self.retried += 1
+                logger.info(
+                    f"Flood control на {type(method).__name__} (chat_id={chat_id}), "
+                    f"повтор через {ex.retry_after} с"
+                )
+                (chat or self._global).penalize(ex.retry_after)
+
+    async def _delete(self, make_request, bot: Bot, method: DeleteMessage | DeleteMessages):
+        ids = [method.message_id] if isinstance(method, DeleteMessage) else method.message_ids
+        pending = self._deletes.get(method.chat_id)
+        if pending is None:
+            task = asyncio.create_task(self._flush_deletes(make_request, bot, method.chat_id))
+            pending = self._deletes[method.chat_id] = ([], [], task)
+        else:
+            self.coalesced += 1
+        future = asyncio.get_running_loop().create_future()
+        pending[0].extend(ids)
+        pending[1].append(future)
+        return await future
+
+    async def _flush_deletes(self, make_request, bot: Bot, chat_id):
+        await asyncio.sleep(self.coalesce_delay)
+        message_ids, futures, _ = self._deletes.pop(chat_id)
+        message_ids = list(dict.fromkeys(message_ids))
+        try:
+            result = True
+            for start in range(0, len(message_ids), DELETE_LIMIT):
+                method = DeleteMessages(
+                    chat_id=chat_id, message_ids=message_ids[start : start + DELETE_LIMIT]
+                )
+                result = await self._send(make_request, bot, method) and result
+        except Exception as ex:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        for future in futures:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """Статистика планировщика.
+
+        Returns:
+            dict: Повторы после RetryAfter и объединённые удаления.
+        """
+        return {"retried": self.retried, "coalesced": self.coalesced}
+
+
+# Общий лимит делится между процессами-обработчиками
+scheduler = OutboundScheduler(
+    rate=int(getenv("BOT_RATE") or 30) / max(int(getenv("WORKERS") or 0), 1),
+    chat_rate=float(getenv("BOT_CHAT_RATE") or 1),
+    chat_burst=float(getenv("BOT_CHAT_BURST") or 3),
+    retries=int(getenv("BOT_RETRIES") or 3),
+)
@@ -0,0 +1,195 @@
+import asyncio
+import multiprocessing
+from os import getenv
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from app.logger import setup_logger
+from app.roles.admin import admin
+from app.roles.moderator import moderator
+from app.roles.user import user
+
+logger = setup_logger(__name__)
+
+# Количество процессов-обработчиков, 0 - обработка в основном процессе
+WORKERS = int(getenv("WORKERS") or 0)
+
+
+def shard_key(update: Update) -> int:
+    """Ключ шардирования обновления - id отправителя.
+
+    Args:
+        update (Update): Обновление.
+
+    Returns:
+        int: Id пользователя или 0.
+    """
+    from_user = getattr(update.event, "from_user", None)
+    return from_user.id if from_user else 0
+
+
+class ShardingDispatcher(Dispatcher):
+    """Диспетчер-приёмник, раздающий обновления процессам-обработчикам.
+
+    Обновления одного пользователя всегда попадают в один процесс
+    в порядке получения.
+    """
+
+    def __init__(self, queues: list, **kwargs: Any):
+        """Инициализация приёмника.
+
+        Args:
+            queues (list[multiprocessing.Queue]): Очереди процессов-обработчиков.
+        """
+        super().__init__(**kwargs)
+        # Роутеры нужны только для вычисления allowed_updates
+        self.include_routers(user, moderator, admin)
+        self._queues = queues
+
+    async def feed_update(self, bot: Bot, update: Update, **kwargs: Any) -> Any:
+        queue = self._queues[shard_key(update) % len(self._queues)]
+        queue.put_nowait(update.model_dump_json(exclude_none=True))
+
+
+class WorkerPool:
+    """Процессы-обработчики обновлений."""
+
+    def __init__(self, workers: int, target=None):
+        """Инициализация пула.
+
+        Процессы не daemon, иначе они не смогут запустить пул выгрузок;
+        завершение процессов ожидается в stop().
+
+        Args:
+            workers (int): Количество процессов.
+            target (Callable, optional): Точка входа процесса. Defaults to run_worker.
+        """
+        context = multiprocessing.get_context("spawn")
+        self.queues = [context.Queue() for _ in range(workers)]
+        self.processes = [
+            context.Process(target=target or run_worker, args=(i, queue), name=f"worker-{i}")
+            for i, queue in enumerate(self.queues)
+        ]
+
+    def start(self):
+        """Запуск процессов."""
+        for process in self.processes:
+            process.start()
+        logger.info(f"Запущено {len(self.processes)} процессов-обработчиков")
+
+    def dispatcher(self):
+        """Диспетчер-приёмник для polling или webhook.
+
+        Returns:
+            ShardingDispatcher: Диспетчер.
+        """
+        return ShardingDispatcher(self.queues)
+
+    async def stop(self, timeout: float = 30):
+        """Остановка процессов после обработки очередей.
+
+        Args:
+            timeout (float, optional): Ожидание каждого процесса. Defaults to 30.
+        """
+        for queue in self.queues:
+            queue.put(None)
+        for process in self.processes:
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                logger.error(f"Процесс {process.name} не завершился, остановка")
+                process.terminate()
+
+
+def run_worker(index: int, queue):
+    """Точка входа процесса-обработчика.
+
+    Args:
+        index (int): Номер процесса.
+        queue (multiprocessing.Queue): Очередь обновлений.
+    """
+    from app.instances import loop
+
+    loop.run_until_complete(serve_worker(index, queue))
+
+
+async def serve_worker(index: int, queue):
+    """Обработка обновлений из очереди со своими пулом БД и сессией бота.
+
+    Обновления одного пользователя обрабатываются по очереди, кроме частей
+    одного альбома - их собирает AlbumMiddleware.
+
+    Args:
+        index (int): Номер процесса.
+        queue (multiprocessing.Queue): Очередь обновлений.
+    """
+    from app.database.cache import listen_user_changes
+    from app.database.writer import writer
+    from app.dispatcher import build_dispatcher
+    from app.instances import bot
+    from app.middlewares import album_middleware
+    from app.utils.directory import directory
+    from app.utils.export import shutdown_exports
+    from app.utils.notifier import notifier
+
+    dp = build_dispatcher()
+    listener = asyncio.create_task(listen_user_changes())
+    writer.start()
+    notifier.start(bot)
+    chains: dict[int, asyncio.Task] = {}
+    # Части собираемых альбомов: предыдущее обновление пользователя и задачи частей
+    groups: dict[str, tuple[asyncio.Task | None, list[asyncio.Task]]] = {}
+    tasks: set[asyncio.Task] = set()
+
+    async def process(update: Update, previous: asyncio.Task | None):
+        if previous:
+            await asyncio.wait([previous])
+        try:
+            await dp.feed_update(bot, update)
+        except Exception as ex:
+            logger.error(f"Ошибка обработки update (id={update.update_id}) - {ex}")
+
+    logger.info(f"Процесс-обработчик {index} запущен")
+    try:
+        while True:
+            raw = await asyncio.to_thread(queue.get)
+            if raw is None:
+                break
+            update = Update.model_validate_json(raw, context={"bot": bot})
+            key = shard_key(update)
+            group_id = getattr(update.message, "media_group_id", None)
+            if group_id:
+                # Части альбома ждут одно и то же предыдущее обновление и идут
+                # параллельно, чтобы AlbumMiddleware собрал их; следующее
+                # обновление пользователя ждёт все части альбома
+                if group_id not in groups:
+                    groups[group_id] = (chains.get(key), [])
+                previous, parts = groups[group_id]
+                task = asyncio.create_task(process(update, previous))
+                parts.append(task)
+                task.add_done_callback(
+                    lambda _, group_id=group_id, parts=parts: (
+                        groups.pop(group_id, None) if all(p.done() for p in parts) else None
+                    )
+                )
+                chain = asyncio.create_task(asyncio.wait(list(parts)))
+            else:
+                task = chain = asyncio.create_task(process(update, chains.get(key)))
+            chains[key] = chain
+            chain.add_done_callback(
+                lambda t, key=key: chains.pop(key) if chains.get(key) is t else None
+            )
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.wait(tasks)
+        await writer.stop()
+        await notifier.stop()
+        shutdown_exports()
+        listener.cancel()
+        await bot.session.close()
+        logger.info(f"Статистика сборки альбомов: {album_middleware.stats()}")
+        logger.info(f"Статистика справочника имён: {directory.stats()}")
+        logger.info(f"Процесс-обработчик {index} остановлен")
@@ -0,0 +1,118 @@
+"""Бенчмарк выгрузки обращений: CSV через COPY (save_appeals_csv) и excel (save_appeals).
+
+Запускать на тестовой БД из .env: в таблицы добавляются синтетические
+пользователи и обращения (generate_series) в отдельном диапазоне id,
+выгружаются все обращения, после замера строки удаляются. Каждая выгрузка
+выполняется в отдельном процессе; пиковый RSS - процесса выгрузки и его
+пула процессов.
+
+Запуск из корня репозитория:
+    python -m scripts.bench_csv --rows 1000000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import time
+
+# Диапазон id пользователей бенчмарка
+BASE_USER = 8_000_000_000
+
+INSERT_USERS = """
+INSERT INTO "user" (id, role, "regAt")
+SELECT CAST(:base AS bigint) + g, 0, now() FROM generate_series(0, :users - 1) g
+"""
+INSERT_USER_INFO = """
+INSERT INTO "userInfo" ("userId", "fullName", contact)
+SELECT CAST(:base AS bigint) + g, 'Пользователь ' || g, '+7900' || lpad(g::text, 7, '0')
+FROM generate_series(0, :users - 1) g
+"""
+# Обращения старше запаса EXPORT_SETTLE_SECONDS
+INSERT_APPLICATIONS = """
+INSERT INTO application ("msgId", "userId", status, dt, category, address, body, police,
+                         attachments)
+SELECT g, CAST(:base AS bigint) + g % :users, 0,
+       now() - interval '1 day' + g * interval '1 millisecond',
+       'Пожарная сигнализация', 'ул. Ленина, ' || g % 200,
+       'Обращение ' || g || ': ' || repeat('текст обращения ', 12), 'Нет',
+       'https://example.org/' || md5(g::text)
+FROM generate_series(1, :rows) g
+"""
+DELETE_ROWS = (
+    'DELETE FROM application WHERE "userId" >= CAST(:base AS bigint)',
+    'DELETE FROM "userInfo" WHERE "userId" >= CAST(:base AS bigint)',
+    'DELETE FROM "user" WHERE id >= CAST(:base AS bigint)',
+)
+
+
+async def execute(*statements: str, **params):
+    from sqlalchemy import text
+
+    from app.database.models import async_session
+
+    async with async_session() as session:
+        for statement in statements:
+            await session.execute(text(statement), params)
+        await session.commit()
+
+
+def measure(name: str, results):
+    """Процесс выгрузки: время, размер файла, RSS после импорта и пиковый RSS.
+
+    Args:
+        name (str): Имя функции выгрузки из app.database.requests.
+        results (multiprocessing.Queue): Очередь для результата.
+    """
+    import app.database.requests as requests
+    from app.instances import loop
+    from app.utils.export import shutdown_exports
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    _, data, _ = loop.run_until_complete(getattr(requests, name)(BASE_USER, False))
+    elapsed = time.perf_counter() - started
+    shutdown_exports()
+    rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    results.put((elapsed, baseline // 1024, rss // 1024, len(data)))
+
+
+async def main(args):
+    from app.database.models import async_init
+
+    await async_init()
+    params = {"base": BASE_USER, "users": args.users, "rows": args.rows}
+    started = time.perf_counter()
+    await execute(INSERT_USERS, INSERT_USER_INFO, INSERT_APPLICATIONS, **params)
+    print(f"Вставлено {args.rows} обращений за {time.perf_counter() - started:.1f} с")
+
+    context = multiprocessing.get_context("spawn")
+    print(
+        f"{'выгрузка':<18} {'время, с':>9} {'RSS до, МБ':>11} {'пик RSS, МБ':>12} "
+        f"{'размер, МБ':>11}"
+    )
+    try:
+        for name in ("save_appeals_csv", "save_appeals"):
+            # Не daemon: выгрузка excel запускает свой пул процессов
+            results = context.Queue()
+            process = context.Process(target=measure, args=(name, results))
+            process.start()
+            elapsed, baseline, rss, size = await asyncio.to_thread(results.get)
+            await asyncio.to_thread(process.join)
+            print(f"{name:<18} {elapsed:>9.2f} {baseline:>11} {rss:>12} {size / 2**20:>11.1f}")
+    finally:
+        await execute(*DELETE_ROWS, base=BASE_USER)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from app.instances import loop
+
+    loop.run_until_complete(main(args))
@@ -0,0 +1,183 @@
+"""Бенчмарк задержки доставки обновлений: long polling и webhook.
+
+Поднимается локальный сервер, изображающий Bot API: getUpdates отдаёт
+обновления из очереди, в режиме webhook те же обновления отправляются
+POST-запросами в SimpleRequestHandler (handle_in_background=True).
+Задержка - от появления обновления на "сервере тг" до вызова обработчика.
+--delay добавляет одностороннюю сетевую задержку до тг. Webhook здесь без TLS.
+
+Запуск из корня репозитория:
+    python -m scripts.bench_webhook --updates 2000 --interval 0.002 --delay 0.02
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import ClientSession, web
+
+TOKEN = "123456:bench"
+WEBHOOK_PATH = "/webhook"
+
+
+class FakeTelegram:
+    """Минимальный Bot API: getMe, getUpdates из очереди, остальное - ok."""
+
+    def __init__(self, delay: float):
+        """Инициализация сервера.
+
+        Args:
+            delay (float): Односторонняя сетевая задержка, сек.
+        """
+        self.delay = delay
+        self.pending: list[dict] = []
+        self.arrived = asyncio.Event()
+        self.app = web.Application()
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+
+    def push(self, update: dict):
+        self.pending.append(update)
+        self.arrived.set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        params = await request.post()
+        await asyncio.sleep(self.delay)
+        if method == "getme":
+            result = {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        elif method == "getupdates":
+            result = await self.get_updates(
+                int(params.get("offset") or 0), float(params.get("timeout") or 0)
+            )
+        else:
+            result = True
+        await asyncio.sleep(self.delay)
+        return web.json_response({"ok": True, "result": result})
+
+    async def get_updates(self, offset: int, timeout: float) -> list[dict]:
+        self.pending = [u for u in self.pending if u["update_id"] >= offset]
+        if not self.pending:
+            self.arrived.clear()
+            try:
+                await asyncio.wait_for(self.arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.pending[:100]
+
+
+def make_update(update_id: int) -> dict:
+    user = {"id": 1000 + update_id % 500, "is_bot": False, "first_name": "u"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user["id"], "type": "private"},
+            "from": user,
+            "text": "ping",
+        },
+    }
+
+
+async def start_site(app: web.Application) -> tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner, runner.addresses[0][1]
+
+
+async def run(mode: str, args) -> list[float]:
+    """Прогон одного режима.
+
+    Returns:
+        list[float]: Задержки доставки, сек.
+    """
+    telegram = FakeTelegram(args.delay)
+    api_runner, api_port = await start_site(telegram.app)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{api_port}"))
+    bot = Bot(TOKEN, session=session)
+
+    sent: dict[int, float] = {}
+    latencies: list[float] = []
+    done = asyncio.Event()
+    dp = Dispatcher()
+
+    @dp.message()
+    async def on_message(message: Message):
+        latencies.append(time.perf_counter() - sent[message.message_id])
+        if len(latencies) == args.updates:
+            done.set()
+
+    if mode == "polling":
+        polling = asyncio.create_task(
+            dp.start_polling(bot, handle_signals=False, close_bot_session=False)
+        )
+        await asyncio.sleep(0.5)
+
+        async def deliver(update: dict):
+            telegram.push(update)
+
+    else:
+        app = web.Application()
+        SimpleRequestHandler(dp, bot, handle_in_background=True).register(app, path=WEBHOOK_PATH)
+        webhook_runner, webhook_port = await start_site(app)
+        client = ClientSession()
+        url = f"http://127.0.0.1:{webhook_port}{WEBHOOK_PATH}"
+
+        async def post(update: dict):
+            await asyncio.sleep(args.delay)
+            async with client.post(url, json=update) as response:
+                await response.read()
+
+        posts: set[asyncio.Task] = set()
+
+        async def deliver(update: dict):
+            task = asyncio.create_task(post(update))
+            posts.add(task)
+            task.add_done_callback(posts.discard)
+
+    for i in range(1, args.updates + 1):
+        sent[i] = time.perf_counter()
+        await deliver(make_update(i))
+        await asyncio.sleep(args.interval)
+    await asyncio.wait_for(done.wait(), 60)
+
+    if mode == "polling":
+        await dp.stop_polling()
+        await polling
+    else:
+        await client.close()
+        await webhook_runner.cleanup()
+    await session.close()
+    await api_runner.cleanup()
+    return latencies
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=0.002, help="пауза между обновлениями")
+    parser.add_argument("--delay", type=float, default=0.0, help="сетевая задержка до тг")
+    args = parser.parse_args()
+
+    print(f"{'режим':<8} {'обновлений':>10} {'p50, мс':>8} {'p99, мс':>8} {'max, мс':>8}")
+    for mode in ("polling", "webhook"):
+        latencies = [value * 1000 for value in await run(mode, args)]
+        print(
+            f"{mode:<8} {len(latencies):>10} {percentile(latencies, 50):>8.1f} "
+            f"{percentile(latencies, 99):>8.1f} {max(latencies):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
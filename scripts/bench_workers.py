@@ -0,0 +1,246 @@
+"""Бенчмарк пропускной способности обработки обновлений по числу процессов.
+
+Обновления /start от многих пользователей проходят через настоящие роутеры,
+FSM и БД (нужна тестовая БД из .env); Bot API заменён локальным сервером
+в отдельном процессе. WORKERS=0 - обработка в основном процессе, иначе
+раздача через WorkerPool. Время - от начала подачи обновлений до ответа
+на последнее (setMyCommands), после прогрева. Созданные пользователи
+удаляются в конце. Рост с числом процессов ограничен числом доступных ядер.
+
+Запуск из корня репозитория:
+    python -m scripts.bench_workers --updates 4000 --workers 0 1 2 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import ClientSession, web
+
+# Диапазон id пользователей бенчмарка
+BASE_USER = 7_000_000_000
+FINISH_METHOD = "setmycommands"
+
+
+def fake_api(ports):
+    """Процесс Bot API: отвечает на запросы и считает завершённые /start.
+
+    Args:
+        ports (multiprocessing.Queue): Очередь для передачи порта.
+    """
+    finished = 0
+
+    async def handle(request: web.Request) -> web.Response:
+        nonlocal finished
+        method = request.match_info["method"].lower()
+        params = await request.post()
+        if method == "sendmessage":
+            result = {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": int(params["chat_id"]), "type": "private"},
+                "text": params.get("text", ""),
+            }
+        else:
+            finished += method == FINISH_METHOD
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({"finished": finished})
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", handle)
+        app.router.add_get("/stats", stats)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        ports.put(runner.addresses[0][1])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def use_fake_api():
+    """Перенаправление сессии бота текущего процесса на локальный Bot API."""
+    from app.instances import bot
+
+    bot.session.api = TelegramAPIServer.from_base(os.environ["BENCH_API"])
+
+
+def bench_worker(index: int, queue):
+    """Точка входа процесса-обработчика бенчмарка.
+
+    Args:
+        index (int): Номер процесса.
+        queue (multiprocessing.Queue): Очередь обновлений.
+    """
+    from app.instances import loop
+    from app.workers import serve_worker
+
+    use_fake_api()
+    loop.run_until_complete(serve_worker(index, queue))
+
+
+def make_updates(start: int, count: int, users: int) -> list:
+    from aiogram.types import Update
+
+    from app.instances import bot
+
+    updates = []
+    for i in range(start, start + count):
+        user = {"id": BASE_USER + i % users, "is_bot": False, "first_name": "bench"}
+        raw = {
+            "update_id": i,
+            "message": {
+                "message_id": i,
+                "date": int(time.time()),
+                "chat": {"id": user["id"], "type": "private"},
+                "from": user,
+                "text": "/start",
+            },
+        }
+        updates.append(Update.model_validate(raw, context={"bot": bot}))
+    return updates
+
+
+async def wait_finished(client: ClientSession, target: int):
+    while True:
+        async with client.get(f"{os.environ['BENCH_API']}/stats") as response:
+            if (await response.json())["finished"] >= target:
+                return
+        await asyncio.sleep(0.02)
+
+
+async def run(workers: int, args) -> float:
+    """Прогон с заданным числом процессов.
+
+    Returns:
+        float: Время обработки args.updates обновлений, сек.
+    """
+    from app.database.writer import writer
+    from app.dispatcher import build_dispatcher
+    from app.instances import bot
+    from app.utils.notifier import notifier
+    from app.workers import WorkerPool
+
+    client = ClientSession()
+    async with client.get(f"{os.environ['BENCH_API']}/stats") as response:
+        finished = (await response.json())["finished"]
+
+    pool = None
+    if workers:
+        pool = WorkerPool(workers, target=bench_worker)
+        pool.start()
+        dp = pool.dispatcher()
+    else:
+        dp = build_dispatcher()
+        writer.start()
+        notifier.start(bot)
+    tasks: set[asyncio.Task] = set()
+
+    async def feed(updates: list):
+        # Как при polling: каждое обновление обрабатывается отдельной задачей
+        for update in updates:
+            task = asyncio.create_task(dp.feed_update(bot, update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    warmup = max(workers, 1) * 50
+    await feed(make_updates(1, warmup, args.users))
+    await wait_finished(client, finished + warmup)
+
+    updates = make_updates(warmup + 1, args.updates, args.users)
+    started = time.perf_counter()
+    await feed(updates)
+    await wait_finished(client, finished + warmup + args.updates)
+    elapsed = time.perf_counter() - started
+
+    if pool:
+        await pool.stop()
+    else:
+        await asyncio.gather(*tasks)
+        await writer.stop()
+        await notifier.stop()
+        await bot.session.close()
+    await client.close()
+    return elapsed
+
+
+def measure(workers: int, args, results):
+    """Процесс прогона: роутеры подключаются к диспетчеру один раз на процесс.
+
+    Args:
+        workers (int): Количество процессов-обработчиков.
+        args (argparse.Namespace): Параметры бенчмарка.
+        results (multiprocessing.Queue): Очередь для результата.
+    """
+    from app.instances import loop
+
+    use_fake_api()
+    results.put(loop.run_until_complete(run(workers, args)))
+
+
+async def cleanup():
+    """Удаление данных пользователей бенчмарка."""
+    from sqlalchemy import delete
+
+    from app.database.models import ChatName, FsmState, User, async_session
+
+    async with async_session() as session:
+        for model, column in (
+            (FsmState, FsmState.userId),
+            (ChatName, ChatName.userId),
+            (User, User.id),
+        ):
+            await session.execute(delete(model).where(column >= BASE_USER))
+        await session.commit()
+
+
+async def main(args, context):
+    from app.database.models import async_init
+
+    await async_init()
+    print(f"Ядер: {len(os.sched_getaffinity(0))}, пользователей: {args.users}")
+    print(f"{'workers':>7} {'обновлений':>10} {'время, с':>9} {'update/с':>9}")
+    try:
+        for workers in args.workers:
+            results = context.Queue()
+            process = context.Process(target=measure, args=(workers, args, results))
+            process.start()
+            elapsed = await asyncio.to_thread(results.get)
+            await asyncio.to_thread(process.join)
+            print(
+                f"{workers:>7} {args.updates:>10} {elapsed:>9.2f} "
+                f"{args.updates / elapsed:>9.0f}"
+            )
+    finally:
+        await cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=4000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    # Лимиты исходящих запросов не должны ограничивать замер;
+    # переменные наследуются процессами-обработчиками
+    for name in ("BOT_RATE", "BOT_CHAT_RATE", "BOT_CHAT_BURST"):
+        os.environ[name] = "1000000"
+
+    context = multiprocessing.get_context("spawn")
+    ports = context.Queue()
+    api = context.Process(target=fake_api, args=(ports,), daemon=True)
+    api.start()
+    os.environ["BENCH_API"] = f"http://127.0.0.1:{ports.get(timeout=30)}"
+
+    try:
+        asyncio.run(main(args, context))
+    finally:
+        api.terminate()
@@ -0,0 +1,106 @@
+"""Бенчмарк выгрузки excel: прежняя через pandas и потоковая через openpyxl.
+
+Каждый вариант выполняется в отдельном процессе, печатаются время и пиковый RSS.
+Строки генерируются в памяти, БД не нужна.
+
+Запуск из корня репозитория:
+    python -m scripts.bench_xlsx --rows 200000
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+HEADER = [
+    "Id",
+    "Полное имя",
+    "Контакт",
+    "Дата обращения",
+    "Категория",
+    "Обращение",
+    "Доп. информация",
+    "Приложения",
+]
+
+
+def synthetic_rows(count: int):
+    """Строки выгрузки обращений.
+
+    Args:
+        count (int): Количество строк.
+
+    Yields:
+        tuple: Строка в порядке HEADER.
+    """
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        yield (
+            100000 + i % 5000,
+            f"Пользователь {i % 5000}",
+            f"+7900{i % 10000000:07d}",
+            start + timedelta(seconds=i),
+            "Пожарная сигнализация",
+            f"Обращение {i}: " + "текст обращения " * 12,
+            "Нет",
+            f"https://example.org/{i:032x}",
+        )
+
+
+def export_pandas(count: int) -> int:
+    """Прежняя реализация: список словарей, DataFrame и to_excel."""
+    import io
+
+    import pandas as pd
+
+    data = [dict(zip(HEADER, row)) for row in synthetic_rows(count)]
+    file = io.BytesIO()
+    pd.DataFrame(data).to_excel(file, index=False)
+    return len(file.getvalue())
+
+
+def export_stream(count: int) -> int:
+    """Текущая реализация: пачки строк в файл пачек и build_xlsx."""
+    from app.utils.export import EXPORT_BATCH, batch_file, build_xlsx, write_batch
+
+    rows = synthetic_rows(count)
+    with batch_file() as file:
+        while batch := [row for _, row in zip(range(EXPORT_BATCH), rows)]:
+            write_batch(file, batch)
+        file.flush()
+        return len(build_xlsx(HEADER, file.name))
+
+
+def measure(name: str, count: int) -> tuple[float, int, int]:
+    """Выполнение варианта в текущем процессе.
+
+    Returns:
+        tuple[float, int, int]: Время в секундах, пиковый RSS в МБ, размер файла.
+    """
+    started = time.perf_counter()
+    size = MODES[name](count)
+    elapsed = time.perf_counter() - started
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024, size
+
+
+MODES = {"pandas": export_pandas, "stream": export_stream}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    print(f"{'вариант':<8} {'строк':>8} {'время, с':>9} {'пик RSS, МБ':>12} {'размер, МБ':>11}")
+    for name in args.modes:
+        # Свежий процесс на вариант, чтобы пиковый RSS не смешивался
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            elapsed, rss, size = pool.submit(measure, name, args.rows).result()
+        print(f"{name:<8} {args.rows:>8} {elapsed:>9.2f} {rss:>12} {size / 2**20:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
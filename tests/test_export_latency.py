@@ -0,0 +1,96 @@
+import asyncio
+import io
+import os
+import time
+import unittest
+from datetime import datetime, timezone
+
+from openpyxl import load_workbook
+
+from app.utils.export import (
+    EXPORT_BATCH,
+    GzipSpool,
+    batch_file,
+    build_xlsx,
+    export_slot,
+    run_export,
+    shutdown_exports,
+    spool,
+    write_batch,
+)
+
+# Допустимая задержка event loop во время выгрузки
+MAX_LAG = 0.1
+ROWS = 30_000
+
+
+async def measure_lag(done: asyncio.Event, interval: float = 0.01) -> float:
+    """Максимальное опоздание периодической задачи, пока выгрузка не завершена.
+
+    Args:
+        done (asyncio.Event): Завершение выгрузки.
+        interval (float, optional): Период проверки. Defaults to 0.01.
+
+    Returns:
+        float: Максимальная задержка event loop в секундах.
+    """
+    lag = 0.0
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(lag, time.perf_counter() - start - interval)
+    return lag
+
+
+class ExportLatencyTest(unittest.IsolatedAsyncioTestCase):
+    """Выгрузка не должна блокировать обработку обновлений."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_exports()
+
+    async def asyncSetUp(self):
+        # Процессы пула запускаются заранее, чтобы не мерить их старт
+        async with export_slot():
+            await run_export(pow, 2, 10)
+
+    async def test_xlsx_in_pool(self):
+        dt = datetime.now(timezone.utc)
+        row = (1, "Полное имя", "+70000000000", dt, "Категория", "Обращение " * 20, "", "")
+        with batch_file() as file:
+            for _ in range(ROWS // EXPORT_BATCH):
+                write_batch(file, [row] * EXPORT_BATCH)
+            file.flush()
+
+            done = asyncio.Event()
+            lag = asyncio.create_task(measure_lag(done))
+            await asyncio.sleep(0)
+            started = time.perf_counter()
+            async with export_slot():
+                data = await run_export(build_xlsx, ["Id"] * len(row), file.name)
+            elapsed = time.perf_counter() - started
+            done.set()
+            lag = await lag
+
+        # Генерация заметно дольше допустимой задержки, иначе проверка ничего не доказывает
+        self.assertGreater(elapsed, MAX_LAG * 5)
+        self.assertLess(lag, MAX_LAG)
+        sheet = load_workbook(io.BytesIO(data), read_only=True).active
+        self.assertEqual(sum(1 for _ in sheet.iter_rows(values_only=True)), ROWS + 1)
+
+    async def test_gzip_in_thread(self):
+        chunk = os.urandom(32 * 1024).hex().encode()
+        done = asyncio.Event()
+        lag = asyncio.create_task(measure_lag(done))
+        await asyncio.sleep(0)
+        with spool() as file:
+            output = GzipSpool(file)
+            for _ in range(100):
+                await output.write(chunk)
+            await output.close()
+        done.set()
+        self.assertLess(await lag, MAX_LAG)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import unittest
+
+os.environ.setdefault("TOKEN_BOT", "123456:TEST")
+
+from app.workers import WorkerPool  # noqa: E402
+
+
+def export_in_worker(index: int, queue):
+    """Выгрузка из процесса-обработчика, результат возвращается через его очередь.
+
+    Args:
+        index (int): Номер процесса.
+        queue (multiprocessing.Queue): Очередь процесса.
+    """
+    import asyncio
+
+    from app.utils.export import (
+        batch_file,
+        build_xlsx,
+        export_slot,
+        run_export,
+        shutdown_exports,
+        write_batch,
+    )
+
+    async def export():
+        with batch_file() as file:
+            write_batch(file, [(1, "a"), (2, "b")])
+            file.flush()
+            async with export_slot():
+                return await run_export(build_xlsx, ["Id", "Имя"], file.name)
+
+    try:
+        queue.put(("ok", len(asyncio.run(export()))))
+    except Exception as ex:
+        queue.put(("error", repr(ex)))
+    finally:
+        shutdown_exports()
+
+
+class WorkerExportTest(unittest.IsolatedAsyncioTestCase):
+    """Процесс-обработчик должен уметь запускать пул выгрузок."""
+
+    async def test_export_in_worker(self):
+        pool = WorkerPool(1, target=export_in_worker)
+        pool.start()
+        try:
+            status, result = pool.queues[0].get(timeout=60)
+        finally:
+            await pool.stop()
+        self.assertEqual(status, "ok", result)
+        self.assertGreater(result, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()